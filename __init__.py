@@ -9,7 +9,7 @@ Created on Fri Jun 7 2019
 import json
 from collections import OrderedDict as ODict
 
-from variables.variable import VARIABLES, CUSTOM_VARIABLES, create_customvariable 
+from variables.variable import VARIABLES, CUSTOM_VARIABLES, VECTORS, DERIVED_VARIABLES, create_customvariable 
 from variables.custom import *
 from variables.date import *
 from variables.geography import *
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Variable Benchmarks
+@author: Jack Kirby Cook
+
+"""
+
+import sys
+import json
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from variables.variable import create_customvariable
+from variables.date import Date, Datetime, Timedelta
+from variables.geography import Geography
+
+__version__ = "1.0.0"
+__author__ = "Jack Kirby Cook"
+__all__ = ['footprint', 'footprints']
+__copyright__ = "Copyright 2018, Jack Kirby Cook"
+__license__ = ""
+
+
+SIZE = 100000
+CATEGORIES = ('a', 'b', 'c')
+
+
+class BenchmarkSpec(object):
+    def __init__(self, datatype, dataname, categories=()): 
+        self.datatype, self.dataname, self.categories = datatype, dataname, tuple(categories)
+        self.indexes = list(range(len(self.categories)))
+    
+    def __hash__(self): return hash((self.__class__.__name__, self.datatype, self.dataname))
+    def __eq__(self, other): return (self.datatype, self.dataname) == (other.datatype, other.dataname)
+    def __ne__(self, other): return not self.__eq__(other)
+    
+    def index(self, category): return self.categories.index(category)
+    def asstr(self, value): return str(value)
+    def jsonstr(self): return json.dumps(dict(data=self.datatype, name=self.dataname))
+
+
+def _mangle(cls, attr): return '_'.join(['', cls.__name__.lstrip('_') + attr]) if attr.startswith('__') and not attr.endswith('__') else attr
+def _attributes(variable): return [_mangle(cls, attr) for cls in reversed(variable.__mro__) for attr in cls.__dict__.get('__slots__', ()) if attr != '__weakref__']
+
+def _baseline(instances):
+    if not instances: return 0
+    attributes = _attributes(type(instances[0]))
+    DictBacked = type('_'.join([type(instances[0]).__name__, 'DictBacked']), (object,), {})
+    tracemalloc.start()
+    try:
+        start = tracemalloc.take_snapshot()
+        baselines = []
+        for instance in instances:
+            baseline = DictBacked()
+            for attribute in attributes: 
+                try: setattr(baseline, attribute, object.__getattribute__(instance, attribute))
+                except AttributeError: pass
+            baselines.append(baseline)
+        stop = tracemalloc.take_snapshot()
+    finally: tracemalloc.stop()
+    return sum([stat.size_diff for stat in stop.compare_to(start, 'filename')])
+
+def footprint(variable, values):
+    values = list(values)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.take_snapshot()
+        instances = [variable(value) for value in values]
+        stop = tracemalloc.take_snapshot()
+    finally: tracemalloc.stop()
+    total = sum([stat.size_diff for stat in stop.compare_to(start, 'filename')])
+    baseline = total - sum([sys.getsizeof(instance) for instance in instances]) + _baseline(instances)
+    size = max(len(instances), 1)
+    return dict(variable=variable.__name__, size=len(instances), total=total, baseline=baseline, perinstance=total / size, perbaseline=baseline / size, saving=1 - total / baseline if baseline else 0)
+
+def defaults():
+    variables = {datatype:create_customvariable(BenchmarkSpec(datatype, 'benchmark', categories=CATEGORIES if datatype in ('category', 'histogram') else ())) for datatype in ('num', 'range', 'category', 'histogram')}
+    return {Date: lambda index: date(2000, 1, 1) + timedelta(days=index % 10000), 
+            Datetime: lambda index: datetime(2000, 1, 1) + timedelta(seconds=index), 
+            Timedelta: lambda index: timedelta(seconds=index),
+            Geography: lambda index: {'state':index % 50, 'county':index % 100},
+            variables['num']: lambda index: float(index),
+            variables['range']: lambda index: (index, index + 1),
+            variables['category']: lambda index: CATEGORIES[:index % len(CATEGORIES) + 1],
+            variables['histogram']: lambda index: {category:index % (position + 2) for position, category in enumerate(CATEGORIES)}}
+
+def footprints(size=SIZE, samples=None): return [footprint(variable, [sample(index) for index in range(size)]) for variable, sample in (samples if samples is not None else defaults()).items()]
+
+
+if __name__ == '__main__':
+    for result in footprints(): print('{variable}: size={size}, perinstance={perinstance:.1f}, baseline={perbaseline:.1f}, saving={saving:.1%}'.format(**result))
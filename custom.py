@@ -5,17 +5,18 @@ Created on Sun Jun 9 2019
 @author: Jack Kirby Cook
 """
 
+from functools import reduce
+from itertools import chain
 import numpy as np
-import scipy.stats as stats
 from numbers import Number
 
 from utilities.dispatchers import keyword_singledispatcher as keydispatcher
 
-from variables.variable import CustomVariable, VariableOverlapError
+from variables.variable import CustomVariable, Vector, VariableOverlapError, interning
 
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
-__all__ = ['Category', 'Histogram', 'Num', 'Range']
+__all__ = ['Category', 'Histogram', 'Num', 'Range', 'NumVector', 'HistogramMatrix', 'IntervalArray', 'CategoryArray', 'RangeIndex']
 __copyright__ = "Copyright 2018, Jack Kirby Cook"
 __license__ = ""
 
@@ -23,7 +24,20 @@ __license__ = ""
 _aslist = lambda items: [items] if not isinstance(items, (list, tuple)) else list(items)
 
 
+def _lookups(spec):
+    codetable = {category:code for code, category in enumerate(spec.categories)}
+    indextable = {category:spec.index(category) for category in spec.categories}
+    categorytable = {index:category for category, index in indextable.items()}
+    return dict(codetable=codetable, indextable=indextable, categorytable=categorytable)
+
+
 class Category(CustomVariable, datatype='category'): 
+    __slots__ = ('__index', '__mask')
+    
+    def initialize(self):
+        self.__index = tuple([self.indextable[item] for item in self.value])
+        self.__mask = sum([1 << self.codetable[item] for item in set(self.value)])
+
     def __int__(self): 
         if len(self.value) > 1: raise ValueError(self.value)
         else: return int(self.index[0])
@@ -31,24 +45,40 @@ class Category(CustomVariable, datatype='category'):
         if len(self.value) > 1: raise ValueError(self.value)
         else: return float(self.index[0])
     
+    @classmethod
+    def setup(cls): 
+        for key, table in _lookups(cls.spec).items(): setattr(cls, key, table)
+    
+    @property
+    def index(self): return self.__index
     @property
-    def index(self): return tuple([self.spec.index(item) for item in self.value])      
+    def mask(self): return self.__mask
     
     def checkvalue(self, value): 
         if not isinstance(value, tuple): raise ValueError(value)
         if not all([isinstance(item, str) for item in value]): raise ValueError(value)
-        if not all([item in self.spec.categories for item in value]): raise ValueError(value)          
+        if not all([item in self.codetable for item in value]): raise ValueError(value)          
     def fixvalue(self, value): 
         if isinstance(value, str): return (value,)
         else: return value
+    @classmethod
+    def checkvalues(cls, values): 
+        if not all([isinstance(value, tuple) for value in values]): raise ValueError(values)
+        items = set(chain.from_iterable(values))
+        if not all([isinstance(item, str) for item in items]): raise ValueError(items)
+        if not items.issubset(cls.codetable.keys()): raise ValueError(items - cls.codetable.keys())
         
     def contains(self, other): 
         if self.spec != other.spec: raise TypeError(type(other).__name__)             
-        return all([item in self.value for item in other.value])
+        return not other.mask & ~self.mask
     def overlaps(self, other): 
         if self.spec != other.spec: raise TypeError(type(other).__name__)             
-        return any([item in self.value for item in other.value])
+        return bool(self.mask & other.mask)
        
+    def __hash__(self): return hash((hash(self.spec), self.mask,))
+    def __eq__(self, other): 
+        if self.spec != other.spec: raise TypeError(type(other).__name__)        
+        return self.mask == other.mask      
     def __contains__(self, other): return self.contains(other)
     def __iter__(self): 
         for item in self.value: yield item
@@ -58,23 +88,25 @@ class Category(CustomVariable, datatype='category'):
     @classmethod
     def indexes(cls): return cls.spec.indexes
 
-    @classmethod
-    def fromindex(cls, indexes): return cls(tuple([cls.spec.category(index) for index in _aslist(indexes)]))
+    @interning
+    def fromindex(cls, indexes): return cls(tuple([cls.categorytable[index] for index in _aslist(indexes)]))
     @classmethod
     def fromall(cls): return cls(cls.spec.categories)
 
     # OPERATIONS & TRANSFORMATIONS
-    def expand(self, *args, how=None, **kwargs):
+    def expand(self, *args, how=None, mode='list', **kwargs):
         cls = self.transformation(*args, method='expand', how=how, **kwargs)
-        return [cls((item,)) for item in self.value] 
+        if mode == 'list': return [cls((item,)) for item in self.value] 
+        elif mode == 'generator': return (cls((item,)) for item in self.value)
+        else: raise KeyError(mode)
 
     def add(self, other, *args, **kwargs): 
-        if any([item in self.value for item in other.value]): raise VariableOverlapError(self, other, 'add')
+        if self.mask & other.mask: raise VariableOverlapError(self, other, 'add')
         value = (*self.value, *other.value)
         return self.operation(other.__class__, *args, method='add', **kwargs)(value) 
     def subtract(self, other, *args, **kwargs): 
-        if any([item not in self.values for item in other.values]): raise VariableOverlapError(self, other, 'sub')
-        value = tuple([value for value in self.values if value not in other.values])
+        if other.mask & ~self.mask: raise VariableOverlapError(self, other, 'sub')
+        value = tuple([value for value in self.value if not (1 << self.codetable[value]) & other.mask])
         return self.operation(other.__class__, *args, method='subtract', **kwargs)(value)
 
     def divide(self, other, *args, **kwargs): 
@@ -88,38 +120,108 @@ class Category(CustomVariable, datatype='category'):
 
 
 class Histogram(CustomVariable, datatype='histogram'):
+    __slots__ = ('__statistics', '__aliases')
+    
+    @classmethod
+    def setup(cls): 
+        for key, table in _lookups(cls.spec).items(): setattr(cls, key, table)
+
     def checkvalue(self, value): 
         if not isinstance(value, dict): raise ValueError(value)
         if not all([isinstance(key, str) for key in value.keys()]): raise ValueError(value)
-        if not all([key in self.spec.categories and isinstance(weight, int) for key, weight in value]): raise ValueError(value)    
+        if not all([key in self.codetable and isinstance(weight, int) for key, weight in value.items()]): raise ValueError(value)    
     def fixvalue(self, value): 
         if isinstance(value, str): return (value,)
         else: return value
+    @classmethod
+    def checkvalues(cls, values): 
+        if not all([isinstance(value, dict) for value in values]): raise ValueError(values)
+        keys = set(chain.from_iterable([value.keys() for value in values]))
+        if not all([isinstance(key, str) for key in keys]): raise ValueError(keys)
+        if not keys.issubset(cls.codetable.keys()): raise ValueError(keys - cls.codetable.keys())
+        if not all([isinstance(weight, int) for weight in chain.from_iterable([value.values() for value in values])]): raise ValueError(values)
     
     def __getitem__(self, category): return self.value[category]
     def __len__(self): return len(self.categories)  
     
     @property
-    def categoryvector(self): return list(self.spec.category)
+    def categoryvector(self): return list(self.spec.categories)
     @property
-    def indexvector(self): return np.array(list(self.spec.index))
+    def indexvector(self): return np.array(list(self.spec.indexes))
     @property
     def weightvector(self): return np.array([self.value[category] for category in self.spec.categories])   
     @property
     def index(self): return {category:weight for category, weight in zip(self.categoryvector, self.weightvector)}
     
-    def array(self): return np.array([np.full(weight, value) for value, weight in zip(np.nditer(self.indexvector, np.nditer(self.weightvector)))]).flatten()
-    def sample(self): return np.random.choice(self.indexvector, 1, p=self.weightvector)  
-    def total(self): return np.sum(self.array)
-    def mean(self): return np.mean(self.array)
-    def median(self): return np.median(self.array)
-    def stdev(self): return np.std(self.array)
-    def rstdev(self): return self.std() / self.mean()
-    def skew(self): return stats.skew(self.array)
-    def kurtosis(self): return stats.kurtosis(self.array)
-    
-    def xmin(self): return np.minimum(self.indexvector)
-    def xmax(self): return np.maximum(self.indexvector)
+    @property
+    def statistics(self):
+        try: return self.__statistics
+        except AttributeError: 
+            self.__statistics = self.__calculate()
+            return self.__statistics
+
+    def __calculate(self):
+        indexes, weights = self.indexvector.astype(np.float64), self.weightvector.astype(np.float64)
+        order = np.argsort(indexes, kind='stable')
+        indexes, weights = indexes[order], weights[order]
+        count = weights.sum()
+        mean = np.dot(indexes, weights) / count if count > 0 else np.nan
+        deviations = indexes - mean
+        moments = {power:np.dot(weights, deviations ** power) / count if count > 0 else np.nan for power in (2, 3, 4)}
+        return dict(indexes=indexes, weights=weights, cumulative=np.cumsum(weights), count=count, total=np.dot(indexes, weights), mean=mean, moments=moments)
+
+    @property
+    def aliases(self):
+        try: return self.__aliases
+        except AttributeError: 
+            self.__aliases = self.__alias()
+            return self.__aliases
+
+    def __alias(self):
+        weights = self.weightvector.astype(np.float64)
+        if not weights.sum() > 0: raise ValueError(self.value)
+        probabilitys, aliases = weights * len(weights) / weights.sum(), np.arange(len(weights), dtype=np.int64)
+        smalls, larges = [i for i in range(len(weights)) if probabilitys[i] < 1], [i for i in range(len(weights)) if probabilitys[i] >= 1]
+        while smalls and larges:
+            small, large = smalls.pop(), larges.pop()
+            aliases[small] = large
+            probabilitys[large] = probabilitys[large] + probabilitys[small] - 1
+            if probabilitys[large] < 1: smalls.append(large)
+            else: larges.append(large)
+        probabilitys[smalls + larges] = 1
+        return probabilitys, aliases
+
+    def __position(self, position): 
+        statistics = self.statistics
+        return statistics['indexes'][np.searchsorted(statistics['cumulative'], position, side='right')]
+    
+    def array(self): return np.repeat(self.indexvector, self.weightvector)
+    def sample(self, size=1, rng=None): 
+        rng = rng if rng is not None else np.random.default_rng()
+        probabilitys, aliases = self.aliases
+        indexes = rng.integers(0, len(probabilitys), size=size)
+        indexes = np.where(rng.random(size) < probabilitys[indexes], indexes, aliases[indexes])
+        return self.indexvector[indexes]
+    def total(self): return self.statistics['total']
+    def mean(self): return self.statistics['mean']
+    def median(self): return self.quantile(0.5)
+    def quantile(self, q):
+        assert 0 <= q <= 1
+        if not self.statistics['count'] > 0: return np.nan
+        position = (self.statistics['count'] - 1) * q
+        lower, upper = self.__position(np.floor(position)), self.__position(np.ceil(position))
+        return lower + (position - np.floor(position)) * (upper - lower)
+    def stdev(self): return np.sqrt(self.statistics['moments'][2])
+    def rstdev(self): return self.stdev() / self.mean()
+    def skew(self): 
+        moments = self.statistics['moments']
+        return moments[3] / pow(moments[2], 1.5) if moments[2] > 0 else np.nan
+    def kurtosis(self): 
+        moments = self.statistics['moments']
+        return moments[4] / pow(moments[2], 2) - 3 if moments[2] > 0 else np.nan
+    
+    def xmin(self): return np.min(self.indexvector)
+    def xmax(self): return np.max(self.indexvector)
     def xdev(self, x): 
         if isinstance(x, Number): pass
         elif isinstance(x, str):
@@ -135,10 +237,10 @@ class Histogram(CustomVariable, datatype='histogram'):
     @classmethod
     def indexes(cls): return cls.spec.indexes
 
-    @classmethod
+    @interning
     def fromindex(cls, indexes): 
         assert isinstance(indexes, dict)       
-        return cls({cls.spec.category(index):int(weight) for index, weight in indexes.items()})
+        return cls({cls.categorytable[index]:int(weight) for index, weight in indexes.items()})
     
     # OPERATIONS & TRANSFORMATIONS
     def add(self, other, *args, **kwargs): 
@@ -150,6 +252,8 @@ class Histogram(CustomVariable, datatype='histogram'):
     
 
 class Num(CustomVariable, datatype='num'):  
+    __slots__ = ()
+    
     def __int__(self): return int(self.value)
     def __float__(self): return float(self.value)
         
@@ -158,6 +262,12 @@ class Num(CustomVariable, datatype='num'):
     def fixvalue(self, value):
          if isinstance(value, str): return (float(value) if '.' in value else int(value)) * (-1 if '-' in value else 1)
          else: return value
+    @classmethod
+    def checkvalues(cls, values): 
+        try: 
+            if np.asarray(values).dtype.kind in 'iuf': return
+        except ValueError: pass
+        if not all([isinstance(value, Number) for value in values]): raise ValueError(values)
         
     # OPERATIONS & TRANSFORMATIONS        
     def add(self, other, *args, **kwargs): return self.operation(other.__class__, *args, method='add', **kwargs)(self.value + other.value)   
@@ -186,6 +296,8 @@ class Num(CustomVariable, datatype='num'):
 
 
 class Range(CustomVariable, datatype='range'):  
+    __slots__ = ()
+    
     def checkvalue(self, value): 
         if not isinstance(value, tuple): raise ValueError(value)
         if not len(value) == 2: raise ValueError(value)
@@ -193,6 +305,13 @@ class Range(CustomVariable, datatype='range'):
     def fixvalue(self, value):
          if isinstance(value, Number): return (value, value)
          else: return value
+    @classmethod
+    def checkvalues(cls, values): 
+        if not all([isinstance(value, tuple) and len(value) == 2 for value in values]): raise ValueError(values)
+        try: 
+            if np.asarray(values).dtype.kind in 'iuf': return
+        except ValueError: pass
+        if not all([isinstance(item, (Number, type(None))) for item in chain.from_iterable(values)]): raise ValueError(values)
        
     @property
     def leftvalue(self): return self.value[0]
@@ -305,12 +424,20 @@ class Range(CustomVariable, datatype='range'):
         value = (getvalue(self.leftvalue, bounds[0]), getvalue(self.rightvalue, bounds[-1]))
         return self.transformation(*args, method='boundary', how=how, **kwargs)(value)  
 
-    def expand(self, *args, how=None, bounds=(None, None), **kwargs):
+    def expand(self, *args, how=None, bounds=(None, None), mode='list', **kwargs):
         assert isinstance(bounds, (tuple, list))
         assert len(bounds) == 2
         getvalue = lambda value, bound: value if value is not None else bound
         cls = self.transformation(*args, method='expand', how=how, **kwargs)
-        return [cls(value) for value in np.arange(getvalue(self.lower, bounds[0]), getvalue(self.upper, bounds[-1]) + self.spec.threshold, self.spec.threshold)]
+        lower, upper = getvalue(self.lower, bounds[0]), getvalue(self.upper, bounds[-1])
+        if mode == 'list': return [cls(value) for value in np.arange(lower, upper + self.spec.threshold, self.spec.threshold)]
+        elif mode == 'array': 
+            values = np.arange(lower, upper + self.spec.threshold, self.spec.threshold)
+            return IntervalArray(cls, values, values)
+        elif mode == 'generator': 
+            count = max(int(np.ceil((upper + self.spec.threshold - lower) / self.spec.threshold)), 0)
+            return (cls(lower + step * self.spec.threshold) for step in range(count))
+        else: raise KeyError(mode)
 
     @keydispatcher('how')
     def consolidate(self, *args, how, **kwargs): raise KeyError(how) 
@@ -336,6 +463,409 @@ class Range(CustomVariable, datatype='range'):
         getvalue = lambda value, bound: value if value is not None else bound
         value = [getvalue(self.leftvalue, bounds[0]), getvalue(self.rightvalue, bounds[-1])]
         return self.transformation(*args, method='consolidate', how=how, **kwargs)(value[-1] - value[0])    
+
+
+class RangeIndex(object):
+    def __init__(self, lowers, uppers):
+        lowers, uppers = np.asarray(lowers, dtype=np.float64), np.asarray(uppers, dtype=np.float64)
+        assert lowers.shape == uppers.shape
+        order = np.lexsort((-uppers, lowers))
+        self.__order, self.__lowers, self.__uppers = order, lowers[order], uppers[order]
+    
+    def __len__(self): return len(self.__order)
+    
+    @staticmethod
+    def bounds(lower, upper): return (lower if lower is not None else -np.inf, upper if upper is not None else np.inf)
+    @classmethod
+    def fromvarray(cls, varray): 
+        bounds = [cls.bounds(item.lower, item.upper) for item in varray]
+        return cls([bound[0] for bound in bounds], [bound[-1] for bound in bounds])
+
+    def overlaps(self, lower, upper):
+        lower, upper = self.bounds(lower, upper)
+        stop = np.searchsorted(self.__lowers, upper, side='left')
+        return np.sort(self.__order[:stop][self.__uppers[:stop] > lower])
+    
+    def contains(self, lower, upper):
+        lower, upper = self.bounds(lower, upper)
+        start, stop = np.searchsorted(self.__lowers, lower, side='left'), np.searchsorted(self.__lowers, upper, side='right')
+        return np.sort(self.__order[start:stop][self.__uppers[start:stop] <= upper])
+    
+    def maximals(self):
+        if not len(self): return np.array([], dtype=np.int64)
+        previous = np.concatenate([[-np.inf], np.maximum.accumulate(self.__uppers)[:-1]])
+        return np.sort(self.__order[self.__uppers > previous])
+    
+    def clusters(self):
+        if not len(self): return []
+        splits = np.flatnonzero(self.__lowers[1:] >= np.maximum.accumulate(self.__uppers)[:-1]) + 1
+        return [np.sort(cluster) for cluster in np.split(self.__order, splits)]
+    
+    def bins(self, values):
+        lowers, uppers = np.array([-np.inf, *values], dtype=np.float64), np.array([*values, np.inf], dtype=np.float64)
+        starts = np.searchsorted(uppers, self.__lowers, side='right')
+        stops = np.searchsorted(lowers, self.__uppers, side='left')
+        groups = [[] for i in range(len(lowers))]
+        for item, start, stop in sorted(zip(self.__order.tolist(), starts.tolist(), stops.tolist())):
+            for index in range(start, stop): groups[index].append(item)
+        return groups
+
+
+class NumVector(Vector, datatype='numvector'):
+    def __init__(self, variable, values):
+        assert variable.datatype == 'num'
+        values = np.asarray(values)
+        dtype = np.int64 if values.dtype.kind in 'biu' else np.float64
+        super().__init__(variable, np.ascontiguousarray(values, dtype=dtype))
+
+    @property
+    def spec(self): return self.variable.spec
+    
+    def __getitem__(self, index): 
+        if isinstance(index, slice): return self.__class__(self.variable, self.values[index])
+        else: return self.variable(self.values[index].item())
+
+    def tovarray(self): return [self.variable.fromtrusted(value) for value in self.values.tolist()]
+    @classmethod
+    def fromvarray(cls, varray): return cls(cls.vectortype(varray), [item.value for item in varray])
+    @classmethod
+    def fromvalues(cls, values, *args, variable, **kwargs): return cls(variable, values)
+
+    # REDUCTIONS
+    def summation(self, *args, **kwargs):
+        assert len(self) > 0
+        cls = self.variable.operation(self.variable, *args, method='add', **kwargs) if len(self) > 1 else self.variable
+        return cls(self.values.sum().item())
+    
+    def mean(self, *args, **kwargs):
+        assert len(self) > 0
+        cls = self.variable.operation(self.variable, *args, method='add', **kwargs) if len(self) > 1 else self.variable
+        cls = cls.transformation(*args, method='factor', how='divide', factor=len(self), **kwargs)
+        return cls(self.values.mean().item())
+    
+    def average(self, *args, weights=None, **kwargs):
+        assert len(self) > 0
+        weights = np.full(len(self), 1/len(self)) if weights is None else np.asarray(weights, dtype=np.float64)
+        assert len(weights) == len(self)
+        classes = [self.variable.transformation(*args, method='factor', how='multiply', factor=weight, **kwargs) for weight in weights.tolist()]
+        cls = reduce(lambda x, y: x.operation(y, *args, method='add', **kwargs), classes)
+        return cls(np.dot(self.values, weights).item())
+    
+    def minimum(self, *args, **kwargs): return self[int(np.argmin(self.values))]
+    def maximum(self, *args, **kwargs): return self[int(np.argmax(self.values))]
+
+    # CUMULATIONS
+    def cumulate(self, *args, direction, **kwargs):
+        assert direction == 'lower' or direction == 'upper'
+        values = np.cumsum(self.values) if direction == 'lower' else np.cumsum(self.values[::-1])[::-1]
+        cls = self.variable.operation(self.variable, *args, method='add', **kwargs) if len(self) > 1 else self.variable
+        return self.__class__(cls, values)
+    
+    def uncumulate(self, *args, direction, **kwargs):
+        assert direction == 'lower' or direction == 'upper'
+        values = self.values if direction == 'lower' else self.values[::-1]
+        values = np.concatenate([values[:1], np.diff(values)])
+        values = values if direction == 'lower' else values[::-1]
+        cls = self.variable.operation(self.variable, *args, method='subtract', **kwargs) if len(self) > 1 else self.variable
+        return self.__class__(cls, values)
+
+    # MOVING
+
+    def moving_minimum(self, *args, period, **kwargs): return self.__class__(self.variable, self.windows(period).min(axis=1))
+    def moving_maximum(self, *args, period, **kwargs): return self.__class__(self.variable, self.windows(period).max(axis=1))
+    
+    def moving_summation(self, *args, period, **kwargs): 
+        cls = self.variable.operation(self.variable, *args, method='add', period=period, **kwargs) if period > 0 else self.variable
+        return self.__class__(cls, self.windows(period).sum(axis=1))
+    
+    def moving_average(self, *args, period, **kwargs): 
+        cls = self.variable.operation(self.variable, *args, method='add', period=period, **kwargs) if period > 0 else self.variable
+        cls = cls.transformation(*args, method='factor', how='divide', factor=period+1, period=period, **kwargs)
+        return self.__class__(cls, self.windows(period).mean(axis=1))
+
+
+class HistogramMatrix(Vector, datatype='histogrammatrix'):
+    def __init__(self, variable, values):
+        assert variable.datatype == 'histogram'
+        values = np.ascontiguousarray(values, dtype=np.int64)
+        assert values.ndim == 2 and values.shape[1] == len(variable.categories())
+        super().__init__(variable, values)
+
+    @property
+    def spec(self): return self.variable.spec
+    @property
+    def indexvector(self): return np.array(list(self.spec.indexes))
+    @property
+    def weightmatrix(self): return self.values
+    
+    def __getitem__(self, index): 
+        if isinstance(index, slice): return self.__class__(self.variable, self.values[index])
+        else: return self.variable({category:weight for category, weight in zip(self.spec.categories, self.values[index].tolist())})
+
+    def tovarray(self): return [self[index] for index in range(len(self))]
+    @classmethod
+    def fromvarray(cls, varray): return cls(cls.vectortype(varray), [item.weightvector for item in varray])
+    @classmethod
+    def fromvalues(cls, values, *args, variable, **kwargs): return cls(variable, [[value[category] for category in variable.categories()] for value in values])
+
+    # OPERATIONS
+    def add(self, other, *args, **kwargs): 
+        assert len(self) == len(other)
+        return self.__class__(self.variable.operation(other.variable, *args, method='add', **kwargs), self.values + other.values)
+    def subtract(self, other, *args, **kwargs): 
+        assert len(self) == len(other)
+        return self.__class__(self.variable.operation(other.variable, *args, method='subtract', **kwargs), self.values - other.values)
+
+    # REDUCTIONS
+    def summation(self, *args, **kwargs):
+        assert len(self) > 0
+        cls = self.variable.operation(self.variable, *args, method='add', **kwargs) if len(self) > 1 else self.variable
+        return cls({category:weight for category, weight in zip(self.spec.categories, self.values.sum(axis=0).tolist())})
+
+    def groupby_bins(self, *args, values, **kwargs):
+        grpkeys = [(None, values[0]), *[(values[index], values[index+1]) for index in range(len(values)-1)], (values[-1], None)]
+        indexes = np.digitize(self.indexvector, values, right=True)
+        return {grpkey:self.values[:, indexes == index].sum(axis=1) for index, grpkey in enumerate(grpkeys)}
+
+    # STATISTICS: one value per row, pooledmean reduces all rows to a single value
+    def __moments(self):
+        indexes, weights = self.indexvector.astype(np.float64), self.values.astype(np.float64)
+        counts = weights.sum(axis=1)
+        means = weights @ indexes / counts
+        deviations = indexes[np.newaxis, :] - means[:, np.newaxis]
+        return counts, means, {power:(weights * deviations ** power).sum(axis=1) / counts for power in (2, 3, 4)}
+    
+    def total(self): return self.values @ self.indexvector
+    def mean(self): return self.__moments()[1]
+    def pooledmean(self): 
+        weights = self.values.sum(axis=0).astype(np.float64)
+        return float(weights @ self.indexvector.astype(np.float64) / weights.sum()) if weights.sum() > 0 else np.nan
+    def median(self): return self.quantile(0.5)
+    def quantile(self, q):
+        assert 0 <= q <= 1
+        order = np.argsort(self.indexvector, kind='stable')
+        indexes, cumulative = self.indexvector[order].astype(np.float64), np.cumsum(self.values[:, order], axis=1)
+        positions = (cumulative[:, -1] - 1) * q
+        function = lambda position: indexes[np.minimum((cumulative <= position[:, np.newaxis]).sum(axis=1), len(indexes) - 1)]
+        lower, upper = function(np.floor(positions)), function(np.ceil(positions))
+        return lower + (positions - np.floor(positions)) * (upper - lower)
+    def stdev(self): return np.sqrt(self.__moments()[2][2])
+    def rstdev(self): 
+        counts, means, moments = self.__moments()
+        return np.sqrt(moments[2]) / means
+    def skew(self): 
+        counts, means, moments = self.__moments()
+        return moments[3] / np.power(moments[2], 1.5)
+    def kurtosis(self): 
+        counts, means, moments = self.__moments()
+        return moments[4] / np.power(moments[2], 2) - 3
+
+    # SAMPLING
+    def sample(self, size=1, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        weights = self.values.astype(np.float64)
+        cumulative = np.cumsum(weights, axis=1) / weights.sum(axis=1, keepdims=True)
+        offsets = np.arange(len(self))[:, np.newaxis]
+        positions = np.searchsorted((cumulative + offsets).flatten(), rng.random((len(self), size)) + offsets, side='right')
+        return self.indexvector[np.minimum(positions - offsets * weights.shape[1], weights.shape[1] - 1)]
+
+
+class IntervalArray(Vector, datatype='intervalarray'):
+    def __init__(self, variable, lowers, uppers):
+        assert variable.datatype == 'range'
+        lowers = np.array([value if value is not None else -np.inf for value in lowers] if isinstance(lowers, list) else lowers, dtype=np.float64)
+        uppers = np.array([value if value is not None else np.inf for value in uppers] if isinstance(uppers, list) else uppers, dtype=np.float64)
+        assert lowers.shape == uppers.shape and lowers.ndim == 1
+        super().__init__(variable, np.ascontiguousarray(np.stack([lowers, uppers], axis=1)))
+        self.__openlowers, self.__openuppers = np.isneginf(lowers), np.isposinf(uppers)
+    
+    @property
+    def spec(self): return self.variable.spec
+    @property
+    def lowers(self): return self.values[:, 0]
+    @property
+    def uppers(self): return self.values[:, 1]
+    @property
+    def openlowers(self): return self.__openlowers
+    @property
+    def openuppers(self): return self.__openuppers
+    @property
+    def index(self): return RangeIndex(self.lowers, self.uppers)
+    
+    def __bound(self, value, isopen): return None if isopen else (int(value) if float(value).is_integer() else value)
+    def __getitem__(self, index): 
+        if isinstance(index, (slice, list, np.ndarray)): return self.__class__(self.variable, self.lowers[index], self.uppers[index])
+        lower, upper = self.values[index].tolist()
+        return self.variable((self.__bound(lower, self.openlowers[index]), self.__bound(upper, self.openuppers[index])))
+
+    def tovarray(self): return [self[index] for index in range(len(self))]
+    @classmethod
+    def fromvarray(cls, varray): return cls(cls.vectortype(varray), [item.lower for item in varray], [item.upper for item in varray])
+    @classmethod
+    def fromvalues(cls, values, *args, variable, **kwargs): return cls(variable, [value[0] for value in values], [value[-1] for value in values])
+    
+    def __other(self, other):
+        if isinstance(other, IntervalArray): 
+            if self.spec != other.spec: raise TypeError(type(other).__name__)
+            return other.lowers, other.uppers
+        elif isinstance(other, Range): 
+            if self.spec != other.spec: raise TypeError(type(other).__name__)
+            return RangeIndex.bounds(other.lower, other.upper)
+        elif isinstance(other, Num): return other.value, other.value
+        elif isinstance(other, Number): return other, other
+        else: raise TypeError(type(other).__name__)
+    
+    def contains(self, other): 
+        lowers, uppers = self.__other(other)
+        return (self.lowers <= lowers) & (self.uppers >= uppers)
+    def overlaps(self, other): 
+        lowers, uppers = self.__other(other)
+        return (self.lowers < uppers) & (self.uppers > lowers)
+    
+    # CUMULATIONS
+    def cumulation(self, *args, direction, **kwargs):
+        assert direction == 'lower' or direction == 'upper'
+        gaps = np.abs(self.lowers[1:] - self.uppers[:-1])
+        invalid = np.flatnonzero(~(gaps <= self.spec.threshold))
+        if len(invalid): raise VariableOverlapError(self[int(invalid[0])], self[int(invalid[0])+1], 'add')
+        lowers = np.full(len(self), self.lowers[0]) if direction == 'lower' else self.lowers
+        uppers = np.full(len(self), self.uppers[-1]) if direction == 'upper' else self.uppers
+        cls = self.variable.operation(self.variable, *args, method='add', **kwargs) if len(self) > 1 else self.variable
+        return self.__class__(cls, lowers, uppers)
+
+    # TRANSFORMATIONS
+    def __bounded(self, bounds):
+        assert isinstance(bounds, (tuple, list))
+        assert len(bounds) == 2
+        lowers = np.where(self.openlowers, bounds[0] if bounds[0] is not None else -np.inf, self.lowers)
+        uppers = np.where(self.openuppers, bounds[-1] if bounds[-1] is not None else np.inf, self.uppers)
+        return lowers, uppers
+        
+    def split(self, value, *args, how=None, **kwargs):
+        value = round(value, self.spec.threshold)
+        splits = (self.lowers < value) & (self.uppers > value)
+        lowers = np.insert(self.lowers, np.flatnonzero(splits) + 1, value + self.spec.threshold)
+        uppers = np.insert(self.uppers, np.flatnonzero(splits), value)
+        return self.__class__(self.variable.transformation(*args, method='split', how=how, **kwargs), lowers, uppers)
+
+    def boundary(self, *args, how=None, bounds=(None, None), **kwargs):
+        return self.__class__(self.variable.transformation(*args, method='boundary', how=how, **kwargs), *self.__bounded(bounds))
+
+    def expand(self, *args, how=None, bounds=(None, None), **kwargs):
+        lowers, uppers = self.__bounded(bounds)
+        assert np.all(np.isfinite(lowers)) and np.all(np.isfinite(uppers))
+        counts = np.maximum(np.ceil((uppers + self.spec.threshold - lowers) / self.spec.threshold), 0).astype(np.int64)
+        steps = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        values = np.repeat(lowers, counts) + steps * self.spec.threshold
+        return self.__class__(self.variable.transformation(*args, method='expand', how=how, **kwargs), values, values)
+
+    @keydispatcher('how')
+    def consolidate(self, *args, how, **kwargs): raise KeyError(how) 
+    
+    @consolidate.register('average')
+    def average(self, *args, how='average', weight=0.5, bounds=[None, None], **kwargs):
+        assert all([how == 'average', isinstance(weight, Number), weight<=1, weight>=0])
+        lowers, uppers = self.__bounded(bounds)
+        assert np.all(np.isfinite(lowers)) and np.all(np.isfinite(uppers))
+        cls = self.variable.transformation(*args, method='consolidate', how=how, weight=weight, **kwargs)
+        return NumVector(cls, weight * lowers + (1-weight) * uppers)
+    
+    @consolidate.register('cumulate')
+    def cumulate(self, *args, how='cumulate', direction, **kwargs):
+        assert all([how == 'cumulate', direction == 'lower' or direction == 'upper'])
+        values = {'upper':self.lowers, 'lower':self.uppers}[direction]
+        assert np.all(np.isfinite(values))
+        cls = self.variable.transformation(*args, method='consolidate', how=how, direction=direction, **kwargs)
+        return NumVector(cls, values)
+    
+    @consolidate.register('differential')
+    def differential(self, *args, how='differential', bounds=(None, None), **kwargs):
+        assert how == 'differential'
+        lowers, uppers = self.__bounded(bounds)
+        cls = self.variable.transformation(*args, method='consolidate', how=how, **kwargs)
+        return NumVector(cls, uppers - lowers)
+
+
+class CategoryArray(Vector, datatype='categoryarray'):
+    def __init__(self, variable, values):
+        assert variable.datatype == 'category'
+        values = np.ascontiguousarray(values, dtype=np.uint64)
+        assert values.ndim == 2 and values.shape[1] == self.words(variable)
+        super().__init__(variable, values)
+
+    @staticmethod
+    def words(variable): return max((len(variable.codetable) + 63) // 64, 1)
+    @property
+    def spec(self): return self.variable.spec
+    @property
+    def bits(self): return self.__unpack(self.values)
+    def __unpack(self, values): return np.unpackbits(values.astype('<u8').view(np.uint8), axis=1, bitorder='little')[:, :len(self.variable.codetable)].astype(bool)
+    @property
+    def counts(self): return self.bits.sum(axis=1)
+    
+    def __getitem__(self, index): 
+        if isinstance(index, (slice, list, np.ndarray)): return self.__class__(self.variable, self.values[index])
+        categories = self.spec.categories
+        return self.variable(tuple([categories[code] for code in np.flatnonzero(self.__unpack(self.values[[index]])[0])]))
+
+    def tovarray(self): 
+        categories = self.spec.categories
+        return [self.variable.fromtrusted(tuple([categories[code] for code in np.flatnonzero(row)])) for row in self.bits]
+    @classmethod
+    def fromvarray(cls, varray): return cls.fromvalues([item.value for item in varray], variable=cls.vectortype(varray))
+    @classmethod
+    def fromvalues(cls, values, *args, variable, **kwargs): 
+        pairs = [(row, variable.codetable[item]) for row, value in enumerate(values) for item in _aslist(value)]
+        rows, codes = np.array([pair[0] for pair in pairs], dtype=np.int64), np.array([pair[-1] for pair in pairs], dtype=np.int64)
+        masks = np.zeros((len(values), cls.words(variable)), dtype=np.uint64)
+        np.bitwise_or.at(masks, (rows, codes // 64), np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+        return cls(variable, masks)
+    
+    def __other(self, other):
+        if self.spec != other.spec: raise TypeError(type(other).__name__)
+        if isinstance(other, CategoryArray): return other.values
+        elif isinstance(other, Category): return self.fromvalues([other.value], variable=self.variable).values
+        else: raise TypeError(type(other).__name__)
+    
+    def contains(self, other): return ~np.any(self.__other(other) & ~self.values, axis=1)
+    def overlaps(self, other): return np.any(self.values & self.__other(other), axis=1)
+    
+    # OPERATIONS & TRANSFORMATIONS
+    def expand(self, *args, how=None, **kwargs):
+        rows, codes = np.nonzero(self.bits)
+        masks = np.zeros((len(codes), self.values.shape[1]), dtype=np.uint64)
+        masks[np.arange(len(codes)), codes // 64] = np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64))
+        return self.__class__(self.variable.transformation(*args, method='expand', how=how, **kwargs), masks)
+    
+    def add(self, other, *args, **kwargs):
+        values = self.__other(other)
+        overlaps = np.flatnonzero(np.any(self.values & values, axis=1))
+        if len(overlaps): raise VariableOverlapError(self[int(overlaps[0])], other[int(overlaps[0])] if isinstance(other, CategoryArray) else other, 'add')
+        return self.__class__(self.variable.operation(other.variable if isinstance(other, CategoryArray) else other.__class__, *args, method='add', **kwargs), self.values | values)
+    def subtract(self, other, *args, **kwargs):
+        values = self.__other(other)
+        missing = np.flatnonzero(np.any(values & ~self.values, axis=1))
+        if len(missing): raise VariableOverlapError(self[int(missing[0])], other[int(missing[0])] if isinstance(other, CategoryArray) else other, 'sub')
+        return self.__class__(self.variable.operation(other.variable if isinstance(other, CategoryArray) else other.__class__, *args, method='subtract', **kwargs), self.values & ~values)
+    def couple(self, other, *args, **kwargs):
+        values = self.__other(other)
+        return self.__class__(self.variable.operation(other.variable if isinstance(other, CategoryArray) else other.__class__, *args, method='couple', **kwargs), self.values | values)
+
+    # REDUCTIONS
+    def coupling(self, *args, **kwargs):
+        assert len(self) > 0
+        cls = self.variable.operation(self.variable, *args, method='couple', **kwargs) if len(self) > 1 else self.variable
+        return self.__class__(cls, np.bitwise_or.reduce(self.values, axis=0, keepdims=True))[0]
+    def summation(self, *args, **kwargs):
+        assert len(self) > 0
+        if self.counts.sum() != self.__class__(self.variable, np.bitwise_or.reduce(self.values, axis=0, keepdims=True)).counts.sum(): 
+            raise VariableOverlapError(self[0], self[1:], 'add')
+        cls = self.variable.operation(self.variable, *args, method='add', **kwargs) if len(self) > 1 else self.variable
+        return self.__class__(cls, np.bitwise_or.reduce(self.values, axis=0, keepdims=True))[0]
+
+    def groupby_bins(self, *args, values, **kwargs):
+        grpkeys = [self.variable.fromindex(value) for value in values]
+        return {grpkey:self[np.flatnonzero(self.overlaps(grpkey))] for grpkey in grpkeys}
     
 
     
@@ -6,16 +6,17 @@ Created on Sat Apr 7 2018
 
 """
 
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 from parse import parse
+import numpy as np
 import math
-import time
+import re
 
-from variables.variable import Variable
+from variables.variable import Variable, Vector, interning
 
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
-__all__ = ['Datetime', 'Date', 'Timedelta']
+__all__ = ['Datetime', 'Date', 'Timedelta', 'DatetimeArray', 'DateArray', 'TimedeltaArray']
 __copyright__ = "Copyright 2018, Jack Kirby Cook"
 __license__ = ""
 
@@ -26,20 +27,58 @@ DATETIME = ('year', 'month', 'day', 'hour', 'minute', 'second')
 DATETIMEFORMAT = '%Y-%m-%d %H:%M:%S.%f'
 TIMEDELTA = ('days', 'hours', 'minutes', 'seconds')
 TIMEDELTAFORMAT = '{days} {hours}:{minutes}:{seconds}'
+SECONDS = {'days':60*60*24, 'hours':60*60, 'minutes':60, 'seconds':1}
+ISOFORMATS = {DATEFORMAT:re.compile(r'\d{4}-\d{2}-\d{2}'), DATETIMEFORMAT:re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?')}
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCHORDINAL = EPOCH.toordinal()
+
+
+def dateformats(datefmt):
+    datefmts = []
+    if '.' in datefmt: 
+        datefmts.append(datefmt)
+        datefmt = datefmt.rpartition('.')[0]
+    while '-' in datefmt: 
+        datefmts.append(datefmt)
+        datefmt = datefmt.rpartition('-')[0]
+    return datefmts + [datefmt]
+
+def strpdate(datestr, datefmt, parsers=None):
+    parsers = parsers if parsers is not None else {}
+    try: return datetime.strptime(datestr, parsers[datefmt])
+    except (KeyError, ValueError): pass
+    for parsefmt in dateformats(datefmt):
+        try: value = datetime.strptime(datestr, parsefmt)
+        except ValueError: continue
+        parsers[datefmt] = parsefmt
+        return value
+    raise ValueError(datestr)
+
+def strpdates(datestrs, datefmt, unit):
+    datestrs = list(datestrs)
+    if datefmt in ISOFORMATS.keys() and all([isinstance(datestr, str) and ISOFORMATS[datefmt].fullmatch(datestr) for datestr in datestrs]):
+        try: values = np.array(datestrs, dtype='datetime64[{}]'.format(unit))
+        except ValueError: values = None
+        if values is not None and not np.any(np.isnat(values)): return values
+    parsers = {}
+    return np.array([strpdate(datestr, datefmt, parsers) for datestr in datestrs], dtype='datetime64[{}]'.format(unit))
 
 
 class Datetime(Variable, datatype='datetime'):  
+    __slots__ = ('__index', '__dateformat')
     fields = DATE   
+    reference = timezone.utc
+    defaultformat = DATETIMEFORMAT
 
     def __init__(self, value): 
-        try: super().__init__(date(value.year, value.month, value.day, value.hour, value.minute, value.second))
+        try: super().__init__(datetime(value.year, value.month, value.day, value.hour, value.minute, value.second))
         except AttributeError: 
             try: 
                 datesegments = [int(x) for x in str(value).split('T')[0].split('-')]
                 timesegments = [int(x) for x in str(value).split('T')[1].split('+')[0].split(':')]
-                super().__init__(date(*datesegments, **{key:value for key, value in zip(('hour', 'minute', 'second'), timesegments)}))
+                super().__init__(datetime(*datesegments, **{key:value for key, value in zip(('hour', 'minute', 'second'), timesegments)}))
             except: super().__init__(value)
-        self.setformat(DATETIMEFORMAT)
+    def initialize(self): self.__index = int((self.value.replace(tzinfo=self.reference) - EPOCH).total_seconds())
     
     def checkvalue(self, value):
         if not isinstance(value, datetime): raise ValueError(value)
@@ -50,53 +89,58 @@ class Datetime(Variable, datatype='datetime'):
        
     def __str__(self): return self.strftime(self.dateformat)  
     def __repr__(self): return '{}({})'.format(self.__class__.__name__,  ', '.join(['='.join([attr, str(getattr(self, attr))]) for attr in self.fields])) 
-    def __getattr__(self, attr): return getattr(self.value, attr)  
+    def __getattr__(self, attr): 
+        if attr.startswith('_'): raise AttributeError(attr)
+        return getattr(self.value, attr)  
     
     @property
-    def timestamp(self): return int(time.mktime(self.timetuple()))     
+    def timestamp(self): return self.__index
     @classmethod
-    def fromtimestamp(cls, timestamp): return cls(datetime.fromtimestamp(int(timestamp)))   
+    def fromtimestamp(cls, timestamp): return cls(datetime.fromtimestamp(int(timestamp), tz=cls.reference).replace(tzinfo=None))   
     
     @property
-    def index(self): return self.timestamp
-    @classmethod
+    def index(self): return self.__index
+    @interning
     def fromindex(cls, index): return cls.fromtimestamp(index)
     
     @property
-    def dateformat(self): return self.__dateformat    
-    def setformat(self, dateformat): self.__dateformat = dateformat
+    def dateformat(self): 
+        try: return self.__dateformat
+        except AttributeError: return self.defaultformat
+    def setformat(self, dateformat): 
+        instance = self.fromtrusted(self.value) if self.interned is not None and self in self.interned else self
+        instance.__dateformat = dateformat
+        return instance
  
     def __add__(self, other):  
+        if isinstance(other, TimedeltaArray): return DatetimeArray(self.__class__, np.datetime64(self.value, 'us') + other.values)
         assert isinstance(other, Timedelta)
         return self.__class__(self.value + other.value)
     def __sub__(self, other):
+        if isinstance(other, TimedeltaArray): return DatetimeArray(self.__class__, np.datetime64(self.value, 'us') - other.values)
         assert isinstance(other, Timedelta)
         return self.__class__(self.value - other.value)
     
     @classmethod
     def fromnow(cls): return cls(datetime.now())    
+    @interning
+    def fromstr(cls, datetimestr, **kwargs): return cls(strpdate(datetimestr, kwargs.get('dateformat', DATETIMEFORMAT)))
     @classmethod
-    def fromstr(cls, datetimestr, **kwargs): 
-        datefmt = kwargs.get('dateformat', DATETIMEFORMAT)
-        if '.' in datefmt:
-            try: return cls(datetime.strptime(datetimestr, datefmt))  
-            except ValueError: datefmt = datefmt.rpartition('.')[0]   
-        while '-' in datefmt:
-            try: return cls(datetime.strptime(datetimestr, datefmt))   
-            except ValueError: datefmt = datefmt.rpartition('-')[0]  
-        try: return cls(datetime.strptime(datetimestr, datefmt))    
-        except: raise ValueError(datetimestr)   
+    def fromstrs(cls, datetimestrs, **kwargs): return [cls(value) for value in strpdates(datetimestrs, kwargs.get('dateformat', DATETIMEFORMAT), 's').tolist()]
     
 
 class Date(Variable, datatype='date'):
+    __slots__ = ('__index', '__dateformat')
     fields = DATE    
+    reference = timezone.utc
+    defaultformat = DATEFORMAT
     
     def __init__(self, value): 
         try: super().__init__(date(value.year, value.month, value.day))
         except AttributeError: 
             try: super().__init__(date(*[int(x) for x in str(value).split('T')[0].split('-')]))
             except: super().__init__(value)
-        self.setformat(DATEFORMAT)
+    def initialize(self): self.__index = self.value.toordinal() - EPOCHORDINAL
 
     def checkvalue(self, value):
         if not isinstance(value, date): raise ValueError(value)
@@ -107,50 +151,51 @@ class Date(Variable, datatype='date'):
     
     def __str__(self): return self.strftime(self.dateformat)  
     def __repr__(self): return '{}({})'.format(self.__class__.__name__,  ', '.join(['='.join([attr, str(getattr(self, attr))]) for attr in self.fields])) 
-    def __getattr__(self, attr): return getattr(self.value, attr)  
+    def __getattr__(self, attr): 
+        if attr.startswith('_'): raise AttributeError(attr)
+        return getattr(self.value, attr)  
 
     @property
-    def timestamp(self): return int(time.mktime(self.timetuple()))     
+    def timestamp(self): return int((datetime(self.year, self.month, self.day, tzinfo=self.reference) - EPOCH).total_seconds())
     @classmethod
-    def fromtimestamp(cls, timestamp): return cls(datetime.fromtimestamp(int(timestamp)))   
+    def fromtimestamp(cls, timestamp): return cls(datetime.fromtimestamp(int(timestamp), tz=cls.reference).replace(tzinfo=None))   
     
     @property
-    def index(self): return self.timestamp
-    @classmethod
-    def fromindex(cls, index): return cls.fromtimestamp(index)
+    def index(self): return self.__index
+    @interning
+    def fromindex(cls, index): return cls(date.fromordinal(int(index) + EPOCHORDINAL))
     
     @property
-    def dateformat(self): return self.__dateformat
-    def setformat(self, dateformat): self.__dateformat = dateformat
+    def dateformat(self): 
+        try: return self.__dateformat
+        except AttributeError: return self.defaultformat
+    def setformat(self, dateformat): 
+        instance = self.fromtrusted(self.value) if self.interned is not None and self in self.interned else self
+        instance.__dateformat = dateformat
+        return instance
     
     def add(self, *args, years=0, months=0, days=0, **kwargs): return self.__class__(self.value + timedelta(days + (months/12) * 365 + years * 365))
     def sub(self, *args, years, months, days, **kwargs): return self.__class__(self.value - timedelta(days + (months/12) * 365 + years * 365))
     
     @classmethod
     def fromnow(cls): return cls(datetime.now())    
+    @interning
+    def fromstr(cls, datestr, **kwargs): return cls(strpdate(datestr, kwargs.get('dateformat', DATEFORMAT)))
     @classmethod
-    def fromstr(cls, datestr, **kwargs): 
-        datefmt = kwargs.get('dateformat', DATEFORMAT)
-        while '-' in datefmt:
-            try: return cls(datetime.strptime(datestr, datefmt))   
-            except ValueError: datefmt = datefmt.rpartition('-')[0]       
-        try: return cls(datetime.strptime(datestr, datefmt))    
-        except: raise ValueError(datestr)  
+    def fromstrs(cls, datestrs, **kwargs): return [cls(value) for value in strpdates(datestrs, kwargs.get('dateformat', DATEFORMAT), 'D').tolist()]
     
     
 def split_seconds(seconds):
-    function = lambda x, divisor: (math.modf(x/divisor)[0], math.modf(x/divisor)[1]*divisor)       
-    minutes, seconds = function(seconds, 60)
-    hours, minutes = function(minutes, 60)
-    days, hours = function(hours, 24)   
-    return dict(days=days, hours=hours, minutes=minutes, seconds=seconds)     
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)   
+    return dict(days=int(days), hours=int(hours), minutes=int(minutes), seconds=int(seconds) if float(seconds).is_integer() else seconds)     
 
-def compile_seconds(seconds, key):
-    conversions = {'days':lambda x: x/(60*60*24), 'hours':lambda x: x/(60*60), 'minutes':lambda x: x/60, 'seconds':lambda x: x}
-    return conversions[key](seconds)
+def compile_seconds(seconds, key): return seconds / SECONDS[key]
 
     
 class Timedelta(Variable, datatype='timedelta'):  
+    __slots__ = ()
     fields = TIMEDELTA
 
     def __init__(self, value): 
@@ -160,19 +205,23 @@ class Timedelta(Variable, datatype='timedelta'):
             except AttributeError: super().__init__(value)
 
     def checkvalue(self, value):
-        if not isinstance(value, date): raise ValueError(value)
+        if not isinstance(value, timedelta): raise ValueError(value)
     def fixvalue(self, value):
-        if isinstance(value, dict): return timedelta(days=int(value.get('days', 0)), hours=int(value.get('hours', 0)), minutes=int(value.get('minutes', 0)), seconds=int(value.get('seconds', 0)))
+        if isinstance(value, dict): return timedelta(days=int(value.get('days', 0)), hours=int(value.get('hours', 0)), minutes=int(value.get('minutes', 0)), seconds=float(value.get('seconds', 0)))
         else: return value
     
     def __str__(self): return TIMEDELTAFORMAT.format(**split_seconds(self.total_seconds())).lstrip()
-    def __repr__(self): return '{}({})'.format(self.__class__.__name__,  ', '.join(['='.join([attr, str(getattr(self, attr))]) for attr in self.fields])) 
-    def __getattr__(self, attr): return getattr(self.value, attr)  
+    def __repr__(self): return '{}({})'.format(self.__class__.__name__,  ', '.join(['='.join([attr, str(value)]) for attr, value in split_seconds(self.total_seconds()).items()])) 
+    def __getattr__(self, attr): 
+        if attr.startswith('_'): raise AttributeError(attr)
+        return getattr(self.value, attr)  
     
     def __add__(self, other):
+        if isinstance(other, TimedeltaArray): return other + self
         assert isinstance(other, type(self))
         return self.__class__(self.value + other.value)
     def __sub__(self, other):
+        if isinstance(other, TimedeltaArray): return (other * -1) + self
         assert isinstance(other, type(self))
         return self.__class__(self.value - other.value)
     
@@ -186,11 +235,108 @@ class Timedelta(Variable, datatype='timedelta'):
     def total(self, key): return compile_seconds(self.total_seconds(), key)
     
     @classmethod    
-    def fromseconds(cls, seconds): return cls({split_seconds(seconds)})
-    @classmethod
+    def fromseconds(cls, seconds): return cls(timedelta(seconds=seconds))
+    @interning
     def fromstr(cls, timedeltastr, **kwargs): return cls({**parse(TIMEDELTAFORMAT, timedeltastr).named})  
 
 
+class DatetimeArray(Vector, datatype='datetimearray'):
+    unit = 's'
+    
+    def __init__(self, variable, values):
+        assert variable.datatype == self.datatype[:-len('array')]
+        super().__init__(variable, np.ascontiguousarray(values, dtype='datetime64[{}]'.format(self.unit)))
+
+    def __getitem__(self, index): 
+        if isinstance(index, (slice, list, np.ndarray)): return self.__class__(self.variable, self.values[index])
+        else: return self.variable(self.values[index].item())
+    
+    def tovarray(self): return [self.variable(value) for value in self.values.tolist()]
+    @classmethod
+    def fromvarray(cls, varray): return cls(cls.vectortype(varray), [item.value for item in varray])
+    @classmethod
+    def fromvalues(cls, values, *args, variable, **kwargs): return cls(variable, values)
+    
+    @property
+    def timestamp(self): return self.values.astype('datetime64[s]').astype(np.int64)
+    @classmethod
+    def fromtimestamp(cls, timestamps, *args, variable, **kwargs): return cls(variable, np.asarray(timestamps, dtype=np.int64).astype('datetime64[s]'))
+    @classmethod
+    def fromstr(cls, datestrs, *args, variable, **kwargs): return cls(variable, strpdates(datestrs, kwargs.get('dateformat', {'date':DATEFORMAT, 'datetime':DATETIMEFORMAT}[variable.datatype]), cls.unit))
+    
+    def __other(self, other):
+        if isinstance(other, DatetimeArray): return other.values
+        elif isinstance(other, Variable): return np.datetime64(other.value, self.unit)
+        else: return np.datetime64(other, self.unit)
+    def __eq__(self, other): return self.values == self.__other(other)
+    def __ne__(self, other): return self.values != self.__other(other)
+    def __lt__(self, other): return self.values < self.__other(other)
+    def __gt__(self, other): return self.values > self.__other(other)
+    def __le__(self, other): return self.values <= self.__other(other)
+    def __ge__(self, other): return self.values >= self.__other(other)
+    
+    def __delta(self, other):
+        if isinstance(other, Timedelta): return np.timedelta64(other.value).astype('timedelta64[{}]'.format(self.unit))
+        elif isinstance(other, TimedeltaArray): return other.values.astype('timedelta64[{}]'.format(self.unit))
+        else: raise TypeError(type(other).__name__)
+    def __add__(self, other): return self.__class__(self.variable, self.values + self.__delta(other))
+    def __sub__(self, other): return self.__class__(self.variable, self.values - self.__delta(other))
+    
+    def argsort(self): return np.argsort(self.values, kind='stable')
+    def sort(self): return self[self.argsort()]
+    
+    def minimum(self, *args, **kwargs): return self[int(np.argmin(self.values))]
+    def maximum(self, *args, **kwargs): return self[int(np.argmax(self.values))]
+    
+    def moving_minimum(self, *args, period, **kwargs): return self.__class__(self.variable, self.windows(period).min(axis=1))
+    def moving_maximum(self, *args, period, **kwargs): return self.__class__(self.variable, self.windows(period).max(axis=1))
+
+
+class DateArray(DatetimeArray, datatype='datearray'):
+    unit = 'D'
+    
+    def add(self, *args, years=0, months=0, days=0, **kwargs): 
+        return self.__class__(self.variable, self.values + np.timedelta64(int(math.floor(days + (months/12) * 365 + years * 365)), 'D'))
+    def sub(self, *args, years=0, months=0, days=0, **kwargs): 
+        return self.__class__(self.variable, self.values - np.timedelta64(int(math.floor(days + (months/12) * 365 + years * 365)), 'D'))
+
+
+class TimedeltaArray(Vector, datatype='timedeltaarray'):
+    unit = 'us'
+    
+    def __init__(self, variable, values):
+        assert variable.datatype == 'timedelta'
+        super().__init__(variable, np.ascontiguousarray(values, dtype='timedelta64[{}]'.format(self.unit)))
+
+    def __getitem__(self, index): 
+        if isinstance(index, (slice, list, np.ndarray)): return self.__class__(self.variable, self.values[index])
+        else: return self.variable(self.values[index].item())
+    
+    def tovarray(self): return [self.variable.fromtrusted(value) for value in self.values.tolist()]
+    @classmethod
+    def fromvarray(cls, varray): return cls(cls.vectortype(varray), [item.value for item in varray])
+    @classmethod
+    def fromvalues(cls, values, *args, variable, **kwargs): return cls(variable, values)
+    @classmethod
+    def fromseconds(cls, seconds, *args, variable, **kwargs): return cls(variable, np.round(np.asarray(seconds, dtype=np.float64) * pow(10, 6)).astype(np.int64).astype('timedelta64[us]'))
+    
+    def total(self, key): return compile_seconds(self.values.astype('timedelta64[us]').astype(np.int64) / pow(10, 6), key)
+    def strings(self):
+        minutes, seconds = np.divmod(self.total('seconds'), 60)
+        hours, minutes = np.divmod(minutes, 60)
+        days, hours = np.divmod(hours, 24)
+        return [TIMEDELTAFORMAT.format(days=int(d), hours=int(h), minutes=int(m), seconds=int(s) if float(s).is_integer() else s).lstrip() for d, h, m, s in zip(days.tolist(), hours.tolist(), minutes.tolist(), seconds.tolist())]
+    
+    def __other(self, other):
+        if isinstance(other, TimedeltaArray): return other.values
+        elif isinstance(other, Timedelta): return np.timedelta64(other.value, self.unit)
+        else: raise TypeError(type(other).__name__)
+    def __add__(self, other): return self.__class__(self.variable, self.values + self.__other(other))
+    def __sub__(self, other): return self.__class__(self.variable, self.values - self.__other(other))
+    def __mul__(self, factor): return self.__class__(self.variable, np.round(self.values.astype(np.int64) * np.asarray(factor)).astype(np.int64).astype(self.values.dtype))
+    def __truediv__(self, factor): return self.__class__(self.variable, np.round(self.values.astype(np.int64) / np.asarray(factor)).astype(np.int64).astype(self.values.dtype))
+
+
 
 
 
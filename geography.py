@@ -7,16 +7,18 @@ Created on Fri Apr 27 2018
 """
 
 import os.path
+import io
 import csv
+import numpy as np
 from collections import namedtuple as ntuple
 
 from utilities.dictionarys import SliceOrderedDict as SODict
 
-from variables.variable import Variable
+from variables.variable import Variable, Vector, interning
 
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
-__all__ = ['Geography', 'Geopath']
+__all__ = ['Geography', 'Geopath', 'GeographyIndex', 'GeographyArray']
 __copyright__ = "Copyright 2018, Jack Kirby Cook"
 __license__ = ""
 
@@ -34,13 +36,63 @@ _GEOFILENAME = 'geography.csv'
 with open(os.path.join(_DIR, _GEOFILENAME), mode='r') as infile:
     reader = csv.reader(infile)    
     GEOLENGTHS = {row[0]:int(row[1]) for row in reader}
+GEOLEVELS = {key:level for level, key in enumerate(GEOLENGTHS.keys(), start=1)}
+GEOALL = -1
+
+
+# SOURCES: a str or PathLike is a file path, inline=True reads a str as the text itself, anything else is an iterable of geostrs
+def geolines(source, *args, column=None, delimiter=',', inline=False, **kwargs):
+    if not inline and not isinstance(source, (str, os.PathLike)): 
+        for geostr in source: yield geostr
+        return
+    with (io.StringIO(source, newline='') if inline else open(source, mode='r', newline='')) as infile:
+        if column is None: 
+            for line in infile: 
+                if line.strip(): yield line.strip()
+        elif isinstance(column, str): 
+            for row in csv.DictReader(infile, delimiter=delimiter): yield row[column]
+        else: 
+            for row in csv.reader(infile, delimiter=delimiter): yield row[column]
+
+def geoparse(source, *args, validate=True, **kwargs):
+    patterns = {}
+    for geostr in geolines(source, *args, **kwargs):
+        items = [item.partition('=') for item in geostr.strip().split(DELIMITER)]
+        pattern = tuple([item[0] for item in items])
+        if pattern not in patterns: 
+            if validate and not all([key in GEOLENGTHS for key in pattern]): raise ValueError(geostr)
+            patterns[pattern] = pattern
+        yield patterns[pattern], [item[-1] for item in items]
+
+
+def geopack(items):
+    geokey = 0
+    for key, value in items:
+        radix = pow(10, GEOLENGTHS[key]) + 1
+        geokey = geokey * radix + (radix - 1 if value == ALLCHAR else int(value))
+        geokey = geokey * (len(GEOLEVELS) + 1) + GEOLEVELS[key]
+    return geokey
+
+def geounpack(geokey):
+    levels, items = {level:key for key, level in GEOLEVELS.items()}, []
+    while geokey > 0:
+        geokey, level = divmod(geokey, len(GEOLEVELS) + 1)
+        key = levels[level]
+        radix = pow(10, GEOLENGTHS[key]) + 1
+        geokey, value = divmod(geokey, radix)
+        items.append((key, ALLCHAR if value == radix - 1 else str(value).zfill(GEOLENGTHS[key])))
+    return items[::-1]
 
 
 class Geography(Variable, datatype='geography'): 
+    __slots__ = ('__geoID', '__geokey')
+    
     def __geotype(self, value): return 'all' if value == ALLCHAR else 'each'
     def __geonum(self, key, value): return GEOLENGTHS[key] * ALLID if self.__geotype(value) == 'all' else str(value).zfill(GEOLENGTHS[key])
 
-    def __init__(self, value): super().__init__(SODict([(str(key), value if value == ALLCHAR else self.__geonum(key, value)) for key, value in value.items()]))        
+    def __init__(self, value): 
+        super().__init__(SODict([(str(key), value if value == ALLCHAR else self.__geonum(key, value)) for key, value in value.items()]))        
+    def initialize(self): self.__geoID = ''.join([self.__geonum(key, value) for key, value in self.value.items()])
     def checkvalue(self, value):
         if not isinstance(value, SODict): raise ValueError(value)
     def fixvalue(self, value):
@@ -63,9 +115,15 @@ class Geography(Variable, datatype='geography'):
         else: raise TypeError(type(index).__name__)
     
     @property
-    def geoID(self): return ''.join([self.__geonum(key, value) for key, value in zip(self.keys(), self.values())])
+    def geoID(self): return self.__geoID
+    @property
+    def geokey(self): 
+        try: return self.__geokey
+        except AttributeError: 
+            self.__geokey = geopack(self.value.items())
+            return self.__geokey
     @property
-    def index(self): return self.geoID
+    def index(self): return self.__geoID
 
     def get(self, key, default): return self.value.get(key, default)   
     def __getitem__(self, key):
@@ -81,17 +139,150 @@ class Geography(Variable, datatype='geography'):
 
     def __contains__(self, other): return self.contains(other)
     def contains(self, other):
-        for i in range(len(self)):
-            if self.getkey(i) != other.getkey(i): return False
-            if self.getvalue(i) != ALLCHAR and self.getvalue(i) != other.getvalue(i): return False
+        if len(self) > len(other): raise IndexError(len(other))
+        for (key, value), (otherkey, othervalue) in zip(self.value.items(), other.value.items()):
+            if key != otherkey: return False
+            if value != ALLCHAR and value != othervalue: return False
         return True
 
-    @classmethod
+    @interning
     def fromstr(cls, geostr, **kwargs):
         return cls(SODict([tuple([*item.split('=')]) for item in geostr.split(DELIMITER)]))
+    @classmethod
+    def fromgeokey(cls, geokey): return cls(SODict(geounpack(geokey)))
+    @classmethod
+    def fromstrs(cls, source, *args, **kwargs):
+        for pattern, values in geoparse(source, *args, **kwargs): yield cls.fromtrusted(SODict([(key, value if value == ALLCHAR else value.zfill(GEOLENGTHS[key])) for key, value in zip(pattern, values)]))
+
+
+class GeographyIndex(object):
+    def __repr__(self): return '{}(size={})'.format(self.__class__.__name__, self.__size)
+    def __init__(self, geographys=()): 
+        self.__root = {}
+        self.__size = 0
+        for geography in geographys: self.add(geography)
+    
+    def __len__(self): return self.__size
+    def __iter__(self): 
+        for geography in self.__collect(self.__root): yield geography
+    def __contains__(self, geography): return geography in self.__terminals(geography.value.items())
+    
+    def __terminals(self, items):
+        node = self.__root
+        for item in items:
+            try: node = node[item]
+            except KeyError: return []
+        return node.get(None, [])
+    
+    def __collect(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for geography in node.get(None, []): yield geography
+            stack.extend([child for item, child in node.items() if item is not None])
+
+    def __matches(self, items):
+        nodes = [self.__root]
+        for key, value in items:
+            if value == ALLCHAR: nodes = [child for node in nodes for item, child in node.items() if item is not None and item[0] == key]
+            else: nodes = [node[(key, value)] for node in nodes if (key, value) in node]
+        return nodes
+
+    def add(self, geography):
+        node = self.__root
+        for item in geography.value.items(): node = node.setdefault(item, {})
+        node.setdefault(None, []).append(geography)
+        self.__size += 1
+    
+    def members(self, geography): return [member for node in self.__matches(geography.value.items()) for member in self.__collect(node)]
+    def containers(self, geography):
+        containers, nodes = [], [self.__root]
+        for key, value in geography.value.items():
+            nodes = [child for node in nodes for child in (node.get((key, value), None), node.get((key, ALLCHAR), None) if value != ALLCHAR else None) if child is not None]
+            containers.extend([container for node in nodes for container in node.get(None, [])])
+        return containers
+
+    def parent(self, geography):
+        containers = [container for container in self.containers(geography) if container != geography]
+        if not containers: return None
+        return max(containers, key=lambda container: (len(container), -list(container.values()).count(ALLCHAR)))
+
+    def join(self, geographys): return {geography:self.members(geography) for geography in geographys}
+
+
+class GeographyArray(Vector, datatype='geographyarray'):
+    def __init__(self, variable, schema, values):
+        assert variable.datatype == 'geography'
+        schema, values = tuple([str(key) for key in schema]), np.ascontiguousarray(values, dtype=np.int64).reshape(-1, len(schema))
+        if not all([key in GEOLENGTHS for key in schema]): raise ValueError(schema)
+        super().__init__(variable, values)
+        self.__schema = schema
+    
+    def __repr__(self): return '{}({}, size={})'.format(self.__class__.__name__, ', '.join(self.schema), len(self))
+    @property
+    def schema(self): return self.__schema
+    def column(self, key): return self.values[:, self.schema.index(key)]
+    
+    def __geonum(self, key, value): return ALLCHAR if value == GEOALL else str(value).zfill(GEOLENGTHS[key])
+    # INDEXING: arr[rows] selects rows, arr[rows, levels] or arr.levels(levels) selects geography levels
+    def __getitem__(self, index):
+        rows, levels = index if isinstance(index, tuple) else (index, slice(None))
+        schema = self.schema[levels] if isinstance(levels, slice) else (self.schema[levels],)
+        if isinstance(rows, (int, np.integer)): return self.variable(SODict([(key, self.__geonum(key, value)) for key, value in zip(schema, self.values[rows, levels].reshape(-1).tolist())]))
+        return self.__class__(self.variable, schema, self.values[rows, levels])
+    
+    def levels(self, levels): return self[:, levels]
+    def truncate(self, size): return self[:, :size]
+    def tovarray(self): return [self[index] for index in range(len(self))]
+    @classmethod
+    def fromvarray(cls, varray): 
+        schemas = list(set([tuple(item.keys()) for item in varray]))
+        assert len(schemas) == 1
+        return cls(cls.vectortype(varray), schemas[0], [[GEOALL if value == ALLCHAR else int(value) for value in item.values()] for item in varray])
+    @classmethod
+    def fromvalues(cls, values, *args, variable, schema, **kwargs): return cls(variable, schema, [[GEOALL if value == ALLCHAR else int(value) for value in row] for row in values])
+    @classmethod
+    def fromstr(cls, source, *args, variable, **kwargs):
+        schema, rows = None, []
+        for pattern, values in geoparse(source, *args, **kwargs):
+            if schema is None: schema = pattern
+            elif pattern != schema: raise ValueError(DELIMITER.join(pattern))
+            rows.append([GEOALL if value == ALLCHAR else int(value) for value in values])
+        if schema is None: raise ValueError(source)
+        return cls(variable, schema, rows)
+    
+    def __other(self, other):
+        if isinstance(other, GeographyArray): return other.schema, other.values
+        elif isinstance(other, Geography): return tuple(other.keys()), np.array([[GEOALL if value == ALLCHAR else int(value) for value in other.values()]], dtype=np.int64)
+        else: raise TypeError(type(other).__name__)
+    
+    def contains(self, other):
+        schema, values = self.__other(other)
+        if len(self.schema) > len(schema): raise IndexError(len(schema))
+        if schema[:len(self.schema)] != self.schema: return np.zeros(len(self), dtype=bool)
+        return np.all((self.values == GEOALL) | (self.values == values[:, :len(self.schema)]), axis=1)
+    def members(self, other):
+        schema, values = self.__other(other)
+        if len(schema) > len(self.schema): raise IndexError(len(self.schema))
+        if self.schema[:len(schema)] != schema: return np.zeros(len(self), dtype=bool)
+        return np.all((values == GEOALL) | (values == self.values[:, :len(schema)]), axis=1)
+    
+    def add(self, other, *args, **kwargs):
+        schema, values = self.__other(other)
+        assert schema == self.schema
+        assert np.all(self.values[:, :-1] == values[:, :-1])
+        values = self.values.copy()
+        values[:, -1] = GEOALL
+        return self.__class__(self.variable, self.schema, values)
+    def summation(self, *args, **kwargs):
+        assert len(self) > 0
+        assert np.all(self.values[:, :-1] == self.values[0, :-1])
+        return self.variable(SODict([*[(key, value) for key, value in self[0].items()][:-1], (self.schema[-1], ALLCHAR)])) if len(self) > 1 else self[0]
 
 
 class Geopath(Variable, datatype='geopath'): 
+    __slots__ = ()
+    
     def __geotype(self, value): return 'all' if value == ALLCHAR else 'each'
 
     def __init__(self, value): super().__init__(SODict([(key, value) for key, value in value.items()])) 
@@ -123,12 +314,16 @@ class Geopath(Variable, datatype='geopath'):
         elif isinstance(key, slice): return self.__class__(self.value[key])
         else: raise TypeError(type(key).__name__)
 
-    @classmethod
+    @interning
     def fromstr(cls, geostr, **kwargs):
         return cls(SODict([tuple([*item.split('=')]) for item in geostr.split(DELIMITER)]))
+    @classmethod
+    def fromstrs(cls, source, *args, **kwargs):
+        for pattern, values in geoparse(source, *args, validate=False, **kwargs): yield cls.fromtrusted(SODict(list(zip(pattern, values))))
 
 
 class Address(Variable, datatype='address'): 
+    __slots__ = ()
     fields = ADDRESS
         
     def checkvalue(self, value): 
@@ -146,9 +341,11 @@ class Address(Variable, datatype='address'):
     def todict(self): return self.value._asdict()
     
     def __getitem__(self, key): return self.value.todict()[key]
-    def __getattr__(self, attr): return getattr(self.value, attr)  
+    def __getattr__(self, attr): 
+        if attr.startswith('_'): raise AttributeError(attr)
+        return getattr(self.value, attr)  
         
-    @classmethod
+    @interning
     def fromstr(cls, addressstr, **kwargs): 
         street, city, state_zipcode = addressstr.split(',')
         state, zipcode = state_zipcode.split(' ')
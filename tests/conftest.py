@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Variable Test Fixtures
+@author: Jack Kirby Cook
+
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from variables.variable import create_customvariable
+
+
+class Spec(object):
+    def __init__(self, datatype, dataname, categories=(), threshold=1):
+        self.datatype, self.dataname, self.categories, self.threshold = datatype, dataname, tuple(categories), threshold
+        self.indexes = list(range(len(self.categories)))
+
+    def __hash__(self): return hash((self.datatype, self.dataname))
+    def __eq__(self, other): return (self.datatype, self.dataname) == (other.datatype, other.dataname)
+    def __ne__(self, other): return not self.__eq__(other)
+
+    def index(self, category): return self.categories.index(category)
+    def asstr(self, value): return str(value)
+    def asval(self, varstr): return json.loads(varstr)
+    def jsonstr(self): return json.dumps(dict(data=self.datatype, name=self.dataname))
+
+    def operation(self, other, *args, method, **kwargs): return self
+    def transformation(self, *args, method, how, **kwargs): 
+        if method == 'consolidate': return Spec('num', '_'.join([self.dataname, method]))
+        elif method == 'unconsolidate': return Spec('range', '_'.join([self.dataname, method]))
+        else: return self
+
+
+@pytest.fixture
+def Num(): return create_customvariable(Spec('num', 'testnum'))
+@pytest.fixture
+def Range(): return create_customvariable(Spec('range', 'testrange'))
+@pytest.fixture
+def Category(): return create_customvariable(Spec('category', 'testcategory', categories=['a', 'b', 'c']))
+@pytest.fixture
+def Histogram(): return create_customvariable(Spec('histogram', 'testhistogram', categories=['a', 'b', 'c']))
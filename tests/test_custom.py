@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Custom Variable Tests
+@author: Jack Kirby Cook
+
+"""
+
+import numpy as np
+import pytest
+
+from variables.variable import create_customvariable
+from variables.custom import CategoryArray, NumVector, HistogramMatrix
+from variables.varrays import summation, couple, average, mean
+from conftest import Spec
+
+
+def test_category_paths_agree(Category):
+    varray = [Category(('b',)), Category(('a', 'c'))]
+    assert summation(CategoryArray.fromvarray(varray)) == summation(varray)
+    assert hash(summation(CategoryArray.fromvarray(varray))) == hash(summation(varray))
+    assert CategoryArray.fromvarray(varray).tovarray() == varray
+
+def test_category_couple_duplicates(Category):
+    varray = [Category(('b', 'a')), Category(('a',))]
+    assert couple(CategoryArray.fromvarray(varray)) == couple(varray)
+
+def test_histogram_empty_statistics(Histogram):
+    histogram = Histogram({'a':0, 'b':0, 'c':0})
+    assert histogram.total() == 0
+    assert all([np.isnan(statistic) for statistic in (histogram.mean(), histogram.stdev(), histogram.median(), histogram.skew(), histogram.kurtosis())])
+    with pytest.raises(ValueError): histogram.sample()
+
+def test_histogram_statistics(Histogram):
+    histogram = Histogram({'a':1, 'b':2, 'c':1})
+    assert histogram.total() == 4 and histogram.mean() == 1 and histogram.median() == 1
+
+class FactorSpec(Spec):
+    def operation(self, other, *args, method, **kwargs): return FactorSpec('num', '{}_{}_{}'.format(self.dataname, method, other.dataname))
+    def transformation(self, *args, method, how, factor=None, **kwargs): return FactorSpec('num', '{}_{}_{}'.format(self.dataname, how, factor))
+
+def test_numvector_average_varying_weights():
+    Weighted = create_customvariable(FactorSpec('num', 'testweighted'))
+    varray, weights = [Weighted(value) for value in (1, 2, 4)], [0.5, 0.25, 0.25]
+    results, vectors = average(varray, weights=weights), average(NumVector.fromvarray(varray), weights=weights)
+    assert results.value == vectors.value == 2.0
+    assert results.spec == vectors.spec
+
+def test_histogram_mean_reduces(Histogram):
+    varray = [Histogram({'a':1, 'b':0, 'c':1}), Histogram({'a':0, 'b':2, 'c':0}), Histogram({'a':3, 'b':0, 'c':0})]
+    matrix = HistogramMatrix.fromvarray(varray)
+    assert matrix.mean().tolist() == [histogram.mean() for histogram in varray]
+    assert mean(varray) == mean(matrix) == summation(varray).mean() == pytest.approx(4 / 7)
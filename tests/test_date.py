@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Date Tests
+@author: Jack Kirby Cook
+
+"""
+
+import pytest
+from datetime import date
+
+import variables.date as datemodule
+from variables.date import Date, Datetime, DATEFORMAT, strpdates
+
+
+@pytest.mark.parametrize('variable, datestr', [(Date, 'today'), (Date, 'now'), (Date, '2019-06-15T00:00'), (Datetime, '2019-06-15'), (Datetime, '2019-06-15T12:30:00')])
+def test_fromstrs_rejects_nonformat(variable, datestr):
+    with pytest.raises(ValueError): variable.fromstr(datestr)
+    with pytest.raises(ValueError): variable.fromstrs([datestr])
+
+def test_fromstrs_matches_fromstr():
+    datestrs = ['2019-06-15', '2019-12-31']
+    assert Date.fromstrs(datestrs) == [Date.fromstr(datestr) for datestr in datestrs]
+    datetimestrs = ['2019-06-15 12:30:00.250000', '2019-12-31 23:59:59']
+    assert Datetime.fromstrs(datetimestrs) == [Datetime.fromstr(datetimestr) for datetimestr in datetimestrs]
+
+@pytest.mark.parametrize('variable, datestr', [(Date, '2019-06-15'), (Datetime, '2019-06-15 12:30:00')])
+def test_setformat_interned(variable, datestr):
+    variable.setinterning()
+    try:
+        shared, other = variable.fromstr(datestr), variable.fromstr(datestr)
+        formatted = shared.setformat('%Y')
+        assert shared is other and formatted is not shared
+        assert str(formatted) == '2019' and str(shared) == str(variable.fromstr(datestr)) != '2019'
+    finally: variable.clearinterning()
+
+def test_setformat_uninterned():
+    instance = Date.fromstr('2019-06-15')
+    assert instance.setformat('%Y') is instance and str(instance) == '2019'
+
+def test_strpdates_fallback_formats():
+    values = strpdates(['2019-06', '2019-07', '2019'], DATEFORMAT, 'D')
+    assert values.tolist() == [date(2019, 6, 1), date(2019, 7, 1), date(2019, 1, 1)]
+    assert not hasattr(datemodule, 'DATEPARSERS')
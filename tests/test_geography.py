@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Geography Tests
+@author: Jack Kirby Cook
+
+"""
+
+import pathlib
+import numpy as np
+
+from variables.geography import Geography, GeographyIndex, GeographyArray, geolines
+
+
+def test_containers_with_allchar():
+    state, allcounty, county = Geography.fromstr('state=06'), Geography.fromstr('state=06|county=*'), Geography.fromstr('state=06|county=001')
+    index = GeographyIndex([state, allcounty, county])
+    assert index.containers(allcounty) == [state, allcounty]
+    assert index.containers(county) == [state, county, allcounty]
+    assert index.parent(allcounty) == state
+
+def test_geolines_accepts_pathlike(tmp_path):
+    path = tmp_path / 'geographys.txt'
+    path.write_text('state=06|county=001\nstate=06\n')
+    assert list(geolines(pathlib.Path(path))) == list(geolines(str(path))) == ['state=06|county=001', 'state=06']
+
+def test_geographyarray_rows_and_levels():
+    geographys = [Geography.fromstr('state=06|county=001'), Geography.fromstr('state=06|county=003'), Geography.fromstr('state=06|county=*')]
+    array = GeographyArray.fromvarray(geographys)
+    assert len(array[:-1]) == 2 and array[:-1].schema == ('state', 'county')
+    assert array.levels(slice(None, -1)).schema == array.truncate(1).schema == array[:, :-1].schema == ('state',)
+    assert array[np.int64(1)] == array[1] == geographys[1]
+    assert array.truncate(1)[np.int64(2)] == Geography.fromstr('state=06')
+
+def test_fromstrs_inline_and_trusted():
+    geographys = list(Geography.fromstrs('state=6|county=1\nstate=06|county=*\n', inline=True))
+    assert geographys == [Geography.fromstr('state=06|county=001'), Geography.fromstr('state=06|county=*')]
+    assert [geography.geoID for geography in geographys] == [Geography.fromstr(str(geography)).geoID for geography in geographys]
+    assert list(geolines('state=06,county=001\n', column=1, inline=True)) == ['county=001']
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Variable Tests
+@author: Jack Kirby Cook
+
+"""
+
+import pytest
+
+from utilities.dictionarys import SliceOrderedDict as SODict
+
+from variables.geography import Geography
+
+
+@pytest.fixture
+def interned(Num, Range):
+    Num.setinterning()
+    Range.setinterning()
+    yield
+    Num.clearinterning()
+    Range.clearinterning()
+
+
+def test_interning_shares_instances(Num, interned):
+    assert Num.fromvalue(1) is Num.fromvalue(1)
+    assert Num.fromindex(1) is Num.fromvalue(1)
+
+@pytest.mark.parametrize('values', [(1, 1.0, True), (1.0, True, 1), (True, 1, 1.0)])
+def test_interning_keeps_value_types(Num, interned, values):
+    variables = [Num.fromvalue(value) for value in values]
+    assert [type(variable.value) for variable in variables] == [type(value) for value in values]
+    assert len(set([id(variable) for variable in variables])) == len(values)
+
+def test_interning_keeps_range_types(Range, interned):
+    integers, floats = Range.fromvalue((1, 2)), Range.fromvalue((1.0, 2.0))
+    assert integers is not floats
+    assert [type(value) for value in floats.value] == [float, float]
+
+def test_interning_keeps_mapping_order():
+    Geography.setinterning()
+    try:
+        ordered = Geography.fromvalue(SODict([('state', '06'), ('county', '001')]))
+        reordered = Geography.fromvalue(SODict([('county', '001'), ('state', '06')]))
+        assert ordered is not reordered
+        assert reordered.keys() == ['county', 'state']
+    finally: Geography.clearinterning()
+
+def test_interning_evicts_at_limit(Num):
+    Num.setinterning(size=2)
+    try:
+        first, second = Num.fromindex(1), Num.fromindex(2)
+        assert len(Num.interned) == 2
+        third = Num.fromindex(3)
+        assert len(Num.interned) == 2
+        assert Num.fromindex(3) is third and Num.fromindex(2) is second
+        assert Num.fromindex(1) is not first
+    finally: Num.clearinterning()
+
+def test_interning_drops_dead_references(Num):
+    Num.setinterning()
+    try:
+        variable = Num.fromindex(1)
+        assert len(Num.interned) == 1
+        del variable
+        assert len(Num.interned) == 0
+    finally: Num.clearinterning()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+@name:   Variable Function Tests
+@author: Jack Kirby Cook
+
+"""
+
+import pytest
+
+from variables.variable import create_customvariable
+from variables.custom import NumVector
+from variables.varrays import VArray, varray_dispatcher, VArrayExpr, summation, consolidate, moving_summation, moving_average
+from conftest import Spec
+
+
+def test_moving_summation_mixed_magnitudes(Num):
+    varray = [Num(value) for value in [1e17, 1, 1, 1, 1]]
+    results = [item.value for item in moving_summation(varray, period=1)]
+    vectors = moving_summation(NumVector.fromvarray(varray), period=1).values.tolist()
+    assert results == [1e17 + 1, 2.0, 2.0, 2.0]
+    assert results == vectors
+
+def test_moving_summation_matches_naive(Num):
+    values = [0.1 * index + (1e12 if index % 7 == 0 else 0) for index in range(50)]
+    varray = [Num(value) for value in values]
+    results = [item.value for item in moving_summation(varray, period=4)]
+    naive = [sum(values[index:index+5]) for index in range(len(values) - 4)]
+    assert results == pytest.approx(naive, rel=0, abs=1e-3)
+
+def test_moving_average_mixed_magnitudes(Num):
+    varray = [Num(value) for value in [1e17, 1, 1, 1, 1]]
+    results = [item.value for item in moving_average(varray, period=1)]
+    vectors = moving_average(NumVector.fromvarray(varray), period=1).values.tolist()
+    assert results[1:] == [1.0, 1.0, 1.0]
+    assert results == vectors
+
+def test_varray_mixed_variables():
+    Other = create_customvariable(Spec('num', 'testothernum'))
+    First = create_customvariable(Spec('num', 'testfirstnum'))
+    varray = VArray([First(1), Other(2), First(3), Other(4)])
+    assert varray.datatype == 'num' and varray[1:3].datatype == 'num'
+    assert [item.value for item in moving_summation(list(varray), period=1)] == [3, 5, 7]
+
+def test_varray_empty():
+    varray = VArray([])
+    assert varray.datatype is None and varray.variable is None
+    with pytest.raises(AssertionError): summation(varray)
+
+def test_varray_datatype_override(Num):
+    @varray_dispatcher
+    def probe(varray, *args, **kwargs): pass
+    @probe.register('num')
+    def _probe_num(varray, *args, **kwargs): return (varray.__class__, varray.datatype, kwargs)
+    @probe.register('override')
+    def _probe_override(varray, *args, **kwargs): return (varray.__class__, varray.datatype, kwargs)
+    assert probe([Num(1), Num(2)], datatype='passed') == (VArray, 'num', dict(datatype='passed'))
+    assert probe(VArray([Num(1), Num(2)], datatype='override')) == (VArray, 'override', {})
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_expr_matches_eager(Range, columnar):
+    varray = [Range((index * 5, index * 5 + 5)) for index in range(20)]
+    expr = VArrayExpr(varray, columnar=columnar).consolidate(how='average').summation()
+    assert expr.evaluate() == summation(consolidate(varray, how='average'))
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_expr_empty_groups(Range, columnar):
+    varray = [Range((index * 5, index * 5 + 5)) for index in range(4)]
+    results = VArrayExpr(varray, columnar=columnar).groupby_bins(values=[10, 20, 50]).summation().evaluate()
+    assert [value.value if value is not None else None for value in results.values()] == [(0, 10), (10, 20), None, None]
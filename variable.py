@@ -7,11 +7,17 @@ Created on Sun Jun 9 2019
 """
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict as ODict
+from weakref import ref
+from functools import wraps
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import logging
 import json
 
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
-__all__ = ['create_customvariable', 'Variable', 'CustomVariable']
+__all__ = ['create_customvariable', 'interning', 'Variable', 'CustomVariable', 'Vector', 'DerivedVariables', 'InternedVariables']
 __copyright__ = "Copyright 2018, Jack Kirby Cook"
 __license__ = ""
 
@@ -19,19 +25,137 @@ __license__ = ""
 VARIABLES = {}
 CUSTOM_VARIABLES = {}
 CUSTOM_VARIABLE_SUBCLASSES = {}
+VECTORS = {}
+LOGGER = logging.getLogger(__name__)
 
 
 def create_customvariable(spec):
     try: return CUSTOM_VARIABLE_SUBCLASSES[hash(spec)]
-    except:      
+    except KeyError:      
         base = CUSTOM_VARIABLES[spec.datatype]
         name = '_'.join([spec.dataname, base.__name__])
-        attrs = {'spec':spec}
+        attrs = {'spec':spec, '__slots__':()}
         newvariable = type(name, (base,), attrs)
-        print('Created: {}\n'.format(newvariable.name()))
+        LOGGER.debug('Created: %s', newvariable.name())
         CUSTOM_VARIABLE_SUBCLASSES[hash(spec)] = newvariable
         return newvariable  
 
+
+def _freeze(value):
+    if type(value) is dict: return tuple(sorted([(key, _freeze(item)) for key, item in value.items()]))
+    elif hasattr(value, 'items'): return (type(value), tuple([(key, _freeze(item)) for key, item in value.items()]))
+    elif isinstance(value, (list, tuple)): return tuple([_freeze(item) for item in value])
+    elif isinstance(value, set): return frozenset([_freeze(item) for item in value])
+    hash(value)
+    return (type(value), value)
+
+
+class DerivedVariables(object):
+    def __repr__(self): return '{}(size={})'.format(self.__class__.__name__, self.__size)
+    def __init__(self, size=1024): 
+        self.__cache = ODict()
+        self.__size = size
+        self.__hits, self.__misses = 0, 0
+    
+    def __len__(self): return len(self.__cache)
+    def __call__(self, key, function):
+        try: key = _freeze(key)
+        except TypeError: return function()
+        try: 
+            variable = self.__cache[key]
+            self.__cache.move_to_end(key)
+            self.__hits += 1
+            return variable
+        except KeyError: self.__misses += 1
+        variable = self.__cache[key] = function()
+        while len(self.__cache) > self.__size: self.__cache.popitem(last=False)
+        return variable
+
+    def resize(self, size): 
+        self.__size = size
+        while len(self.__cache) > self.__size: self.__cache.popitem(last=False)
+    def clear(self): 
+        self.__cache.clear()
+        self.__hits, self.__misses = 0, 0
+    def stats(self): return dict(hits=self.__hits, misses=self.__misses, size=len(self.__cache), maxsize=self.__size)
+
+
+DERIVED_VARIABLES = DerivedVariables()
+
+
+class InternedVariables(object):
+    def __repr__(self): return '{}(size={})'.format(self.__class__.__name__, self.__size)
+    def __init__(self, size=None): 
+        self.__cache = ODict()
+        self.__pending = []
+        self.__size = size
+        self.__hits, self.__misses = 0, 0
+
+    def __len__(self): 
+        self.__purge()
+        return len(self.__cache)
+    def __contains__(self, variable): 
+        try: key = _freeze((variable.__class__, variable.index))
+        except TypeError: return False
+        reference = self.__cache.get(key)
+        return reference is not None and reference() is variable
+    def __call__(self, key, function):
+        try: key = _freeze(key)
+        except TypeError: return function()
+        try: 
+            variable = self.__get(key)
+            self.__hits += 1
+            return variable
+        except KeyError: self.__misses += 1
+        variable = self.intern(function())
+        self.__store(key, variable)
+        return variable
+
+    def intern(self, variable):
+        try: key = _freeze((variable.__class__, variable.index))
+        except TypeError: return variable
+        try: return self.__get(key)
+        except KeyError: self.__store(key, variable)
+        return variable
+    
+    def __get(self, key): 
+        self.__purge()
+        variable = self.__cache[key]()
+        if variable is None: raise KeyError(key)
+        self.__cache.move_to_end(key)
+        return variable
+    def __store(self, key, variable): 
+        self.__purge()
+        self.__cache[key] = ref(variable, lambda reference, key=key: self.__pending.append((key, reference)))
+        self.__cache.move_to_end(key)
+        self.__evict()
+    def __evict(self): 
+        while self.__size is not None and len(self.__cache) > self.__size: self.__cache.popitem(last=False)
+    def __purge(self): 
+        while self.__pending: 
+            key, reference = self.__pending.pop()
+            if self.__cache.get(key) is reference: del self.__cache[key]
+
+    def resize(self, size): 
+        self.__size = size
+        self.__evict()
+    def clear(self): 
+        self.__cache.clear()
+        self.__pending.clear()
+        self.__hits, self.__misses = 0, 0
+    def stats(self): 
+        hitrate = self.__hits / (self.__hits + self.__misses) if self.__hits + self.__misses else 0
+        return dict(hits=self.__hits, misses=self.__misses, hitrate=hitrate, size=len(self), maxsize=self.__size)
+
+
+def interning(method):
+    @wraps(method)
+    def wrapper(cls, value, *args, **kwargs): 
+        if cls.interned is None: return method(cls, value, *args, **kwargs)
+        key = (cls, value) if method.__name__ == 'fromindex' else (cls, method.__name__, value, args, kwargs)
+        return cls.interned(key, lambda: method(cls, value, *args, **kwargs))
+    return classmethod(wrapper)
+
   
 class VariableOverlapError(Exception):
     def __init__(self, instance, other, operation): 
@@ -39,6 +163,9 @@ class VariableOverlapError(Exception):
         
 
 class Variable(ABC):
+    __slots__ = ('__value', '__weakref__')
+    interned = None
+    
     def __init_subclass__(cls, *args, datatype, **kwargs):
         setattr(cls, 'datatype', datatype.lower())
         VARIABLES[datatype.lower()] = cls
@@ -48,11 +175,16 @@ class Variable(ABC):
         except ValueError: value = self.fixvalue(value)
         self.checkvalue(value)
         self.__value = value   
+        self.initialize()
 
     @abstractmethod
     def checkvalue(self, value): pass
     @abstractmethod
     def fixvalue(self, value): pass
+    def initialize(self): pass
+    @classmethod
+    def checkvalues(cls, values): 
+        for value in values: cls.checkvalue(cls, value)
 
     @classmethod
     def name(cls): return '_'.join([cls.__name__, 'Variable'])
@@ -86,18 +218,35 @@ class Variable(ABC):
         if type(self) != type(other): raise TypeError(type(other).__name__)   
         return self.index >= other.index
 
-    @classmethod
+    @interning
     def fromindex(cls, index): return cls(index)
-    @classmethod
+    @interning
     def fromvalue(cls, value): return cls(value)
+    @classmethod
+    def fromtrusted(cls, value): 
+        instance = cls.__new__(cls)
+        instance.__value = value
+        instance.initialize()
+        return instance
     @abstractmethod
     def fromstr(self): pass        
     @classmethod
     def fromall(cls): raise NotImplementedError('{}.{}()'.format(cls.__name__, 'fromall'))
+    
+    @classmethod
+    def setinterning(cls, size=None): cls.interned = InternedVariables(size)
+    @classmethod
+    def clearinterning(cls): cls.interned = None
 
  
 class CustomVariable(ABC):
-    def __init_subclass__(cls, *args, datatype, **kwargs):
+    __slots__ = ('__value', '__weakref__')
+    interned = None
+    
+    def __init_subclass__(cls, *args, datatype=None, **kwargs):
+        if datatype is None: 
+            if hasattr(cls, 'spec'): cls.setup()
+            return
         setattr(cls, 'datatype', datatype.lower())
         CUSTOM_VARIABLES[datatype.lower()] = cls
 
@@ -110,11 +259,18 @@ class CustomVariable(ABC):
         except ValueError: value = self.fixvalue(value)
         self.checkvalue(value)
         self.__value = value   
+        self.initialize()
 
     @abstractmethod
     def checkvalue(self, value): pass
     @abstractmethod
     def fixvalue(self, value): pass
+    def initialize(self): pass
+    @classmethod
+    def checkvalues(cls, values): 
+        for value in values: cls.checkvalue(cls, value)
+    @classmethod
+    def setup(cls): pass
     
     @classmethod
     def name(cls): return '_'.join([cls.__name__, 'Variable'])
@@ -146,24 +302,85 @@ class CustomVariable(ABC):
         if self.spec != other.spec: raise TypeError(type(other).__name__)     
         return self.index >= other.index
           
-    @classmethod
+    @interning
     def fromindex(cls, index): return cls(index)
-    @classmethod
+    @interning
     def fromvalue(cls, value): return cls(value)
     @classmethod
+    def fromtrusted(cls, value): 
+        instance = cls.__new__(cls)
+        instance.__value = value
+        instance.initialize()
+        return instance
+    @interning
     def fromstr(cls, varstr): return cls(cls.spec.asval(varstr))          
     @classmethod
     def fromall(cls): raise NotImplementedError('{}.{}()'.format(cls.__name__, 'fromall'))
     
+    @classmethod
+    def setinterning(cls, size=None): cls.interned = InternedVariables(size)
+    @classmethod
+    def clearinterning(cls): cls.interned = None
+    
     @classmethod
     def operation(cls, other, *args, method, **kwargs): 
+        key = ('operation', cls.spec, other.spec, method, args, kwargs)
+        return DERIVED_VARIABLES(key, lambda: cls.__operation(other, *args, method=method, **kwargs))
+    @classmethod
+    def transformation(cls, *args, method, how, **kwargs): 
+        key = ('transformation', cls.spec, method, how, args, kwargs)
+        return DERIVED_VARIABLES(key, lambda: cls.__transformation(*args, method=method, how=how, **kwargs))
+    
+    @classmethod
+    def __operation(cls, other, *args, method, **kwargs): 
         try: return create_customvariable(getattr(cls.spec, method)(other.spec, *args, **kwargs))
         except AttributeError: return create_customvariable(cls.spec.operation(other.spec, *args, method=method, **kwargs))
     @classmethod
-    def transformation(cls, *args, method, how, **kwargs): 
+    def __transformation(cls, *args, method, how, **kwargs): 
         try: return create_customvariable(getattr(cls.spec, method)(*args, how=how, **kwargs))
         except AttributeError: return create_customvariable(cls.spec.transformation(*args, method=method, how=how, **kwargs))    
 
+
+class Vector(ABC):
+    def __init_subclass__(cls, *args, datatype, **kwargs):
+        setattr(cls, 'datatype', datatype.lower())
+        VECTORS[datatype.lower()] = cls
+
+    def __init__(self, variable, values): 
+        self.__variable = variable
+        self.__values = values
+
+    @classmethod
+    def name(cls): return '_'.join([cls.__name__, 'Vector'])
+    @property
+    def variable(self): return self.__variable
+    @property
+    def values(self): return self.__values
+    
+    def __repr__(self): return '{}({}, size={})'.format(self.__class__.__name__, self.variable.__name__, len(self))
+    def __len__(self): return len(self.values)
+    def __iter__(self): 
+        for index in range(len(self)): yield self[index]
+    
+    @staticmethod
+    def vectortype(varray): 
+        if getattr(varray, 'variable', None) is not None: return varray.variable
+        varray_types = list(set([item.__class__ for item in varray]))
+        assert len(varray_types) == 1
+        return varray_types[0]
+    def windows(self, period):
+        assert isinstance(period, int)
+        assert len(self) >= period
+        return sliding_window_view(self.values, period + 1) if len(self) > period else np.empty((0, period + 1), dtype=self.values.dtype)
+    
+    @abstractmethod
+    def __getitem__(self, index): pass
+    @abstractmethod
+    def tovarray(self): pass
+    @classmethod
+    @abstractmethod
+    def fromvarray(cls, varray): pass
+
     
     
     
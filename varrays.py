@@ -7,8 +7,15 @@ Created on Thurs Jun 6 2019
 """
 
 from functools import reduce, update_wrapper
+from itertools import accumulate, chain
+from collections import deque, namedtuple as ntuple
+from operator import methodcaller
 from numbers import Number
 import numpy as np
+import time
+
+from variables.variable import Vector
+from variables.custom import NumVector, HistogramMatrix, IntervalArray, CategoryArray, RangeIndex
 
 __version__ = "1.0.0"
 __author__ = "Jack Kirby Cook"
@@ -30,33 +37,71 @@ def varray_fromindex(data, *args, variable, **kwargs):
     assert isinstance(data, list)
     return [variable.fromindex(value) for value in data]
 
-def varray_fromvalues(data, *args, variable, bounds=(None, None), **kwargs): 
+def varray_fromvalues(data, *args, variable, bounds=(None, None), validate=True, **kwargs): 
     assert isinstance(data, list)
-    if variable.datatype == 'num': 
-        if not all([isinstance(value, Number) for value in data]): raise ValueError(data)
-    elif variable.datatype == 'range': 
-        if all([isinstance(value, tuple) for value in data]): pass
-        elif all([isinstance(value, Number) for value in data]): 
-            data = [(bounds[0], data[0])] + [(i, j) for i, j in zip(data[:-1], data[1:])] + [(data[-1], bounds[-1])]
-        else: raise ValueError(data)
-    elif variable.datatype == 'category': 
-        if not all([isinstance(value, tuple) for value in data]): raise ValueError(data)
-    elif variable.datatype == 'histogram': 
-        if not all([isinstance(value, dict) for value in data]): raise ValueError(data)        
-    else: raise ValueError(variable.datatype)
-    return [variable(value) for value in data]
+    if variable.datatype not in ('num', 'range', 'category', 'histogram'): raise ValueError(variable.datatype)
+    if variable.datatype == 'range' and data and all([isinstance(value, Number) for value in data]): 
+        data = [(bounds[0], data[0])] + [(i, j) for i, j in zip(data[:-1], data[1:])] + [(data[-1], bounds[-1])]
+    if validate: variable.checkvalues(data)
+    return [variable.fromtrusted(value) for value in data]
 
 
 # SUPPORT
+class VArray(list):
+    def __init__(self, items=(), *args, variable=None, datatype=None, **kwargs): 
+        super().__init__(items)
+        if variable is None and datatype is None and len(self):
+            variables = set([item.__class__ for item in self])
+            datatypes = set([item.datatype.lower() for item in variables])
+            assert len(datatypes) == 1
+            variable, datatype = variables.pop() if len(variables) == 1 else None, datatypes.pop()
+        self.__variable = variable
+        self.__datatype = datatype.lower() if datatype is not None else (variable.datatype.lower() if variable is not None else None)
+
+    @property
+    def variable(self): return self.__variable
+    @property
+    def datatype(self): return self.__datatype
+    
+    def __getitem__(self, index): 
+        if isinstance(index, slice): return self.__class__(super().__getitem__(index), variable=self.__variable, datatype=self.__datatype)
+        else: return super().__getitem__(index)
+
+
+class VArrayProfiler(object):
+    def __repr__(self): return '{}(enabled={})'.format(self.__class__.__name__, self.__enabled)
+    def __init__(self): 
+        self.__enabled = False
+        self.__records = {}
+    
+    @property
+    def enabled(self): return self.__enabled
+    def enable(self): self.__enabled = True
+    def disable(self): self.__enabled = False
+    
+    def record(self, function, datatype, elapsed): 
+        calls, total = self.__records.get((function, datatype), (0, 0.0))
+        self.__records[(function, datatype)] = (calls + 1, total + elapsed)
+    def clear(self): self.__records.clear()
+    def stats(self, function=None): 
+        records = {key:value for key, value in self.__records.items() if function is None or key[0] == function}
+        return {key:dict(calls=calls, time=total, average=total / calls) for key, (calls, total) in records.items()}
+
+
+PROFILER = VArrayProfiler()
+_typed = lambda varray: varray if isinstance(varray, (Vector, VArray)) else VArray(varray)
+
+
 def varray_datatype(varray): 
+    if isinstance(varray, Vector): return varray.datatype
+    if isinstance(varray, VArray) and varray.datatype is not None: return varray.datatype
     varray_datatypes = list(set([item.datatype.lower() for item in varray]))
     assert len(varray_datatypes) == 1
     return varray_datatypes[0]
 
 def varray_type(varray):
-    varray_types = list(set([item.__class__ for item in varray]))
-    assert len(varray_types) == 1
-    return varray_types[0]    
+    if isinstance(varray, Vector): return varray.variable
+    return Vector.vectortype(varray)
 
 def varray_dispatcher(mainfunc):
     _registry = {}    
@@ -71,13 +116,20 @@ def varray_dispatcher(mainfunc):
             return register_wrapper 
         return register_decorator 
 
+    def profile(): return PROFILER.stats(mainfunc.__name__)
+
     def wrapper(varray, *args, **kwargs): 
+        varray = _typed(varray)
         datatype = varray_datatype(varray)
         if datatype not in registry().keys(): raise VariableMethodNotSupported(mainfunc, datatype)
-        else: return registry()[datatype](varray, *args, **kwargs)  
+        if not PROFILER.enabled: return registry()[datatype](varray, *args, **kwargs)  
+        start = time.perf_counter()
+        try: return registry()[datatype](varray, *args, **kwargs)  
+        finally: PROFILER.record(mainfunc.__name__, datatype, time.perf_counter() - start)
 
     wrapper.register = register 
     wrapper.registry = registry
+    wrapper.profile = profile
     update_wrapper(wrapper, mainfunc)
     return wrapper
     
@@ -87,26 +139,42 @@ def varray_dispatcher(mainfunc):
 def couple(varray, *args, **kwargs): pass
 @couple.register('num', 'range', 'category')
 def _couple(varray, *args, **kwargs): return reduce(lambda x, y: x.couple(y, *args, **kwargs), varray)    
+@couple.register('categoryarray')
+def _couple_vector(varray, *args, **kwargs): return varray.coupling(*args, **kwargs)
 
 @varray_dispatcher
 def summation(varray, *args, **kwargs): pass
 @summation.register('num', 'range', 'category', 'geography')
 def _summation(varray, *args, **kwargs): return reduce(lambda x, y: x.add(y, *args, **kwargs), varray)
+@summation.register('histogram')
+def _summation_histogram(varray, *args, **kwargs): return HistogramMatrix.fromvarray(varray).summation(*args, **kwargs)
+@summation.register('numvector', 'histogrammatrix', 'categoryarray', 'geographyarray')
+def _summation_vector(varray, *args, **kwargs): return varray.summation(*args, **kwargs)
 
 @varray_dispatcher
 def minimum(varray, *args, **kwargs): pass
 @minimum.register('num', 'range', 'date', 'datetime')
 def _minimum(varray, *args, **kwargs): return reduce(lambda x, y: min(x, y), varray)
+@minimum.register('numvector', 'datearray', 'datetimearray')
+def _minimum_vector(varray, *args, **kwargs): return varray.minimum(*args, **kwargs)
       
 @varray_dispatcher
 def maximum(varray, *args, **kwargs): pass
 @maximum.register('num', 'range', 'date', 'datetime')
 def _maximum(varray, *args, **kwargs): return reduce(lambda x, y: max(x, y), varray)
+@maximum.register('numvector', 'datearray', 'datetimearray')
+def _maximum_vector(varray, *args, **kwargs): return varray.maximum(*args, **kwargs)
 
 @varray_dispatcher
 def mean(varray, *args, **kwargs): pass
 @mean.register('num')
-def _mean(varray, *args, **kwargs): return reduce(lambda x, y: x.add(y, *args, **kwargs), varray) / len(varray)
+def _mean(varray, *args, **kwargs): return reduce(lambda x, y: x.add(y, *args, **kwargs), varray).divide(len(varray), *args, **kwargs)
+@mean.register('numvector')
+def _mean_vector(varray, *args, **kwargs): return varray.mean(*args, **kwargs)
+@mean.register('histogram')
+def _mean_histogram(varray, *args, **kwargs): return HistogramMatrix.fromvarray(varray).pooledmean()
+@mean.register('histogrammatrix')
+def _mean_matrix(varray, *args, **kwargs): return varray.pooledmean()
 
 @varray_dispatcher
 def average(varray, *args, **kwargs): pass
@@ -115,6 +183,17 @@ def _average(varray, *args, weights=None, **kwargs):
     if not weights: weights = [1/len(varray)] * len(varray)
     assert len(weights) == len(varray)
     return summation([item.multiply(weight, *args, **kwargs) for item, weight in zip(varray, weights)], *args, **kwargs)   
+@average.register('numvector')
+def _average_vector(varray, *args, weights=None, **kwargs): return varray.average(*args, weights=weights, **kwargs)
+
+
+# SAMPLING
+@varray_dispatcher
+def sample(varray, *args, size=1, rng=None, **kwargs): pass
+@sample.register('histogram')
+def _sample(varray, *args, size=1, rng=None, **kwargs): return HistogramMatrix.fromvarray(varray).sample(size=size, rng=rng)
+@sample.register('histogrammatrix')
+def _sample_matrix(varray, *args, size=1, rng=None, **kwargs): return varray.sample(size=size, rng=rng)
     
 
 #GROUPING    
@@ -138,8 +217,7 @@ def _groupby_bins_range(varray, *args, values, **kwargs):
     RangeVariable = varray_type(varray)
     grpkeys = [[None, values[0]], *[[values[index], values[index+1]] for index in range(len(values)-1)], [values[-1], None]]   
     grpkeys = [RangeVariable(tuple(grpkey)) for grpkey in grpkeys]
-    grpvalues = [[] for i in range(len(grpkeys))]
-    grpvalues = [[item for item in varray if grpkey.overlaps(item)] for grpkey in grpkeys]
+    grpvalues = [[varray[index] for index in grpindexes] for grpindexes in RangeIndex.fromvarray(varray).bins(values)]
     assert len(_flatten(grpvalues)) == len(varray)
     groupings = {grpkey:grpvalue for grpkey, grpvalue in zip(grpkeys, grpvalues)}
     return groupings 
@@ -154,21 +232,42 @@ def _groupby_bins_category(varray, *args, values, **kwargs):
     groupings = {grpkey:grpvalue for grpkey, grpvalue in zip(grpkeys, grpvalues)}
     return groupings 
 
+@groupby_bins.register('histogrammatrix', 'categoryarray')
+def _groupby_bins_vector(varray, *args, values, **kwargs): return varray.groupby_bins(*args, values=values, **kwargs)
+
+@groupby_bins.register('intervalarray')
+def _groupby_bins_intervals(varray, *args, values, **kwargs):
+    grpkeys = [[None, values[0]], *[[values[index], values[index+1]] for index in range(len(values)-1)], [values[-1], None]]   
+    grpkeys = [varray.variable(tuple(grpkey)) for grpkey in grpkeys]
+    groupings = {grpkey:varray[np.array(grpindexes, dtype=np.int64)] for grpkey, grpindexes in zip(grpkeys, varray.index.bins(values))}
+    return groupings 
+
 @varray_dispatcher
 def groupby_contains(varray, *args, **kwargs): pass
-@groupby_contains.register('category', 'range')
+@groupby_contains.register('category')
 def _groupby_contains(varray, *args, **kwargs): 
     groupings = {grpkey:[grpvalue for grpvalue in varray if grpkey.contains(grpvalue)] for grpkey in varray} 
     groupings = {key:values for key, values in groupings.items() if not any([key in othervalues for otherkey, othervalues in groupings.items() if key != otherkey])} 
     return groupings
+@groupby_contains.register('range')
+def _groupby_contains_range(varray, *args, **kwargs): 
+    index = RangeIndex.fromvarray(varray)
+    grpkeys = [varray[grpindex] for grpindex in index.maximals()]
+    groupings = {grpkey:[varray[grpindex] for grpindex in index.contains(grpkey.lower, grpkey.upper)] for grpkey in grpkeys}
+    return groupings
 
 @varray_dispatcher
 def groupby_overlaps(varray, *args, **kwargs): pass
-@groupby_overlaps.register('category', 'range')
+@groupby_overlaps.register('category')
 def _groupby_overlaps(varray, *args, **kwargs):
     groupings = {grpkey:[grpvalue for grpvalue in varray if grpkey.overlaps(grpvalue)] for grpkey in varray}
     groupings = {couple(values):values for values in set(*groupings.values())}
     return groupings
+@groupby_overlaps.register('range')
+def _groupby_overlaps_range(varray, *args, **kwargs):
+    grpvalues = [[varray[grpindex] for grpindex in grpindexes] for grpindexes in RangeIndex.fromvarray(varray).clusters()]
+    groupings = {couple(grpvalue, *args, **kwargs):grpvalue for grpvalue in grpvalues}
+    return groupings
 
 
 # BROADCASTING
@@ -176,6 +275,8 @@ def _groupby_overlaps(varray, *args, **kwargs):
 def consolidate(varray, *args, how, **kwargs): pass
 @consolidate.register('range')
 def _consolidate(varray, *args, how, **kwargs): return [item.consolidate(*args, how=how, **kwargs) for item in varray]   
+@consolidate.register('intervalarray')
+def _consolidate_intervals(varray, *args, how, **kwargs): return varray.consolidate(*args, how=how, **kwargs)
 
 @varray_dispatcher
 def unconsolidate(varray, *args, how, **kwargs): pass
@@ -186,75 +287,130 @@ def _unconsolidate(varray, *args, how, **kwargs): return [item.unconsolidate(*ar
 def boundary(varray, *args, **kwargs): pass
 @boundary.register('range')
 def _boundary(varray, *args, **kwargs): return [item.boundary(*args, **kwargs) for item in varray]   
+@boundary.register('intervalarray')
+def _boundary_intervals(varray, *args, **kwargs): return varray.boundary(*args, **kwargs)
 
 
 # EXPANSIONS
 @varray_dispatcher
 def expansion(varray, *args, **kwargs): pass
 @expansion.register('range', 'category')
-def _expansion(varray, *args, **kwargs): return _flatten([item.expand(*args, **kwargs) for item in varray])
+def _expansion(varray, *args, mode='list', **kwargs): 
+    if mode == 'list': return _flatten([item.expand(*args, mode=mode, **kwargs) for item in varray])
+    elif mode == 'generator': return chain.from_iterable(item.expand(*args, mode=mode, **kwargs) for item in varray)
+    elif mode == 'array' and varray.datatype == 'range': return IntervalArray.fromvarray(varray).expand(*args, **kwargs)
+    elif mode == 'array' and varray.datatype == 'category': return CategoryArray.fromvarray(varray).expand(*args, **kwargs)
+    else: raise KeyError(mode)
+@expansion.register('intervalarray', 'categoryarray')
+def _expansion_intervals(varray, *args, **kwargs): return varray.expand(*args, **kwargs)
 
 
 # MOVING
+def _cumulate(varray, *args, **kwargs): return list(accumulate(varray, lambda x, y: x.add(y, *args, **kwargs)))
+def _uncumulate(varray, *args, **kwargs): return [varray[0]] + [x.subtract(y, *args, **kwargs) for x, y in zip(varray[1:], varray[:-1])]
+
 @varray_dispatcher
 def upper_cumulate(varray, *args, **kwargs): pass
 @upper_cumulate.register('num', 'range')
-def _upper_cumulate(varray, *args, **kwargs): 
-    function = lambda x: [summation(x[slice(0, i+1)], *args, **kwargs) for i in range(len(varray))]
-    return function(varray[::-1])[::-1]
+def _upper_cumulate(varray, *args, **kwargs): return _cumulate(varray[::-1], *args, **kwargs)[::-1]
+@upper_cumulate.register('numvector')
+def _upper_cumulate_vector(varray, *args, **kwargs): return varray.cumulate(*args, direction='upper', **kwargs)
+@upper_cumulate.register('intervalarray')
+def _upper_cumulate_intervals(varray, *args, **kwargs): return varray.cumulation(*args, direction='upper', **kwargs)
 
 @varray_dispatcher
 def lower_cumulate(varray, *args, **kwargs): pass
 @lower_cumulate.register('num', 'range')
-def _lower_cumulate(varray, *args, **kwargs): 
-    function = lambda x: [summation(x[slice(0, i+1)], *args, **kwargs) for i in range(len(varray))]
-    return function(varray)
+def _lower_cumulate(varray, *args, **kwargs): return _cumulate(varray, *args, **kwargs)
+@lower_cumulate.register('numvector')
+def _lower_cumulate_vector(varray, *args, **kwargs): return varray.cumulate(*args, direction='lower', **kwargs)
+@lower_cumulate.register('intervalarray')
+def _lower_cumulate_intervals(varray, *args, **kwargs): return varray.cumulation(*args, direction='lower', **kwargs)
   
 @varray_dispatcher
 def upper_uncumulate(varray, *args, **kwargs): pass
 @upper_uncumulate.register('num', 'range')
-def _upper_uncumulate(varray, *args, **kwargs): 
-    function = lambda x: [x[0]] + [x.subtract(y, *args, **kwargs) for x, y in zip(x[1:], x[:-1])]
-    return function(varray[::-1])[::-1]
+def _upper_uncumulate(varray, *args, **kwargs): return _uncumulate(varray[::-1], *args, **kwargs)[::-1]
+@upper_uncumulate.register('numvector')
+def _upper_uncumulate_vector(varray, *args, **kwargs): return varray.uncumulate(*args, direction='upper', **kwargs)
     
 @varray_dispatcher
 def lower_uncumulate(varray, *args, **kwargs): pass
 @lower_uncumulate.register('num', 'range')
-def _lower_uncumulate(varray, *args, **kwargs): 
-    function = lambda x: [x[0]] + [x.subtract(y, *args, **kwargs) for x, y in zip(x[1:], x[:-1])]
-    return function(varray)
+def _lower_uncumulate(varray, *args, **kwargs): return _uncumulate(varray, *args, **kwargs)
+@lower_uncumulate.register('numvector')
+def _lower_uncumulate_vector(varray, *args, **kwargs): return varray.uncumulate(*args, direction='lower', **kwargs)
+
+def _moving_extremes(varray, function, *args, period, **kwargs):
+    assert isinstance(period, int)
+    assert len(varray) >= period
+    size, window, results = period + 1, deque(), []
+    for index, item in enumerate(varray):
+        while window and function(varray[window[-1]], item): window.pop()
+        window.append(index)
+        if window[0] <= index - size: window.popleft()
+        if index >= size - 1: results.append(varray[window[0]])
+    return results
+
+def _compensated(total, compensation, value):
+    updated = total + value
+    compensation += (total - updated) + value if abs(total) >= abs(value) else (value - updated) + total
+    return updated, compensation
+
+def _moving_totals(varray, *args, period, **kwargs):
+    assert isinstance(period, int)
+    assert len(varray) >= period
+    size, values = period + 1, [item.value for item in varray]
+    if len(values) < size: return []
+    total, compensation = 0, 0
+    for value in values[:size]: total, compensation = _compensated(total, compensation, value)
+    totals = [total + compensation]
+    for index in range(size, len(values)): 
+        total, compensation = _compensated(total, compensation, values[index])
+        total, compensation = _compensated(total, compensation, -values[index-size])
+        totals.append(total + compensation)
+    return totals
 
 @varray_dispatcher
 def moving_minimum(varray, *args, period, **kwargs): pass
 @moving_minimum.register('num', 'date', 'datetime')
-def _moving_minimum(varray, *args, period, **kwargs):
-    assert isinstance(period, int)
-    assert len(varray) >= period
-    return [minimum(varray[i:i+1+period], *args, period=period, **kwargs) for i in range(0, len(varray)-period)]
+def _moving_minimum(varray, *args, period, **kwargs): return _moving_extremes(varray, lambda x, y: x > y, *args, period=period, **kwargs)
+@moving_minimum.register('numvector', 'datearray', 'datetimearray')
+def _moving_minimum_vector(varray, *args, period, **kwargs): return varray.moving_minimum(*args, period=period, **kwargs)
 
 @varray_dispatcher
 def moving_maximum(varray, *args, period, **kwargs): pass
 @moving_maximum.register('num', 'date', 'datetime')
-def _moving_maximum(varray, *args, period, **kwargs):
-    assert isinstance(period, int)
-    assert len(varray) >= period
-    return [maximum(varray[i:i+1+period], *args, period=period, **kwargs) for i in range(0, len(varray)-period)]
+def _moving_maximum(varray, *args, period, **kwargs): return _moving_extremes(varray, lambda x, y: x < y, *args, period=period, **kwargs)
+@moving_maximum.register('numvector', 'datearray', 'datetimearray')
+def _moving_maximum_vector(varray, *args, period, **kwargs): return varray.moving_maximum(*args, period=period, **kwargs)
 
 @varray_dispatcher
 def moving_average(varray, *args, period, **kwargs): pass
 @moving_average.register('num')
 def _moving_average(varray, *args, period, **kwargs):
-    assert isinstance(period, int)
-    assert len(varray) >= period 
-    return [mean(varray[i:i+1+period], *args, period=period, **kwargs) for i in range(0, len(varray)-period)]  
+    totals = _moving_totals(varray, *args, period=period, **kwargs)
+    if not totals: return []
+    cls = summation(varray[0:period+1], *args, period=period, **kwargs).transformation(*args, method='factor', how='divide', factor=period+1, period=period, **kwargs)
+    return [cls(total / (period+1)) for total in totals]
+@moving_average.register('numvector')
+def _moving_average_vector(varray, *args, period, **kwargs): return varray.moving_average(*args, period=period, **kwargs)
 
 @varray_dispatcher
 def moving_summation(varray, *args, period, **kwargs): pass
-@moving_summation.register('num', 'range')
-def moving_summation(varray, *args, period, **kwargs):
+@moving_summation.register('num')
+def _moving_summation_num(varray, *args, period, **kwargs):
+    totals = _moving_totals(varray, *args, period=period, **kwargs)
+    if not totals: return []
+    cls = summation(varray[0:period+1], *args, period=period, **kwargs).__class__
+    return [cls(total) for total in totals]
+@moving_summation.register('range')
+def _moving_summation_range(varray, *args, period, **kwargs):
     assert isinstance(period, int)
     assert len(varray) >= period
     return [summation(varray[i:i+1+period], *args, period=period, **kwargs) for i in range(0, len(varray)-period)]  
+@moving_summation.register('numvector')
+def _moving_summation_vector(varray, *args, period, **kwargs): return varray.moving_summation(*args, period=period, **kwargs)
 
 @varray_dispatcher
 def moving_difference(varray, *args, period, **kwargs): pass
@@ -278,6 +434,91 @@ def _moving_couple(varray, *args, period, **kwargs):
     return [couple(varray[i:i+1+period], *args, period=period, **kwargs) for i in range(0, len(varray)-period)]   
 
 
+# EXPRESSIONS
+VArrayStage = ntuple('VArrayStage', 'kind function method args kwargs')
+COLUMNAR = {'num':NumVector, 'range':IntervalArray, 'category':CategoryArray}
+
+
+class VArrayExpr(object):
+    def __repr__(self): return '{}({})'.format(self.__class__.__name__, ' -> '.join([stage.function.__name__ for stage in self.stages]))
+    def __init__(self, varray, *args, stages=(), columnar=False, **kwargs): 
+        self.__varray = varray
+        self.__stages = tuple(stages)
+        self.__columnar = columnar
+
+    @property
+    def varray(self): return self.__varray
+    @property
+    def stages(self): return self.__stages
+    
+    def __stage(self, kind, function, method, *args, **kwargs): 
+        stages = [*self.__stages, VArrayStage(kind, function, method, args, kwargs)]
+        return self.__class__(self.__varray, stages=stages, columnar=self.__columnar)
+    
+    # BROADCASTING & EXPANSIONS
+    def consolidate(self, *args, how, **kwargs): return self.__stage('broadcast', consolidate, 'consolidate', *args, how=how, **kwargs)
+    def unconsolidate(self, *args, how, **kwargs): return self.__stage('broadcast', unconsolidate, 'unconsolidate', *args, how=how, **kwargs)
+    def boundary(self, *args, **kwargs): return self.__stage('broadcast', boundary, 'boundary', *args, **kwargs)
+    def expansion(self, *args, **kwargs): return self.__stage('expansion', expansion, 'expand', *args, **kwargs)
+    
+    # GROUPING
+    def groupby_bins(self, *args, values, **kwargs): return self.__stage('grouping', groupby_bins, None, *args, values=values, **kwargs)
+    def groupby_contains(self, *args, **kwargs): return self.__stage('grouping', groupby_contains, None, *args, **kwargs)
+    def groupby_overlaps(self, *args, **kwargs): return self.__stage('grouping', groupby_overlaps, None, *args, **kwargs)
+    
+    # REDUCTIONS
+    def summation(self, *args, **kwargs): return self.__stage('reduction', summation, None, *args, **kwargs)
+    def mean(self, *args, **kwargs): return self.__stage('reduction', mean, None, *args, **kwargs)
+    def minimum(self, *args, **kwargs): return self.__stage('reduction', minimum, None, *args, **kwargs)
+    def maximum(self, *args, **kwargs): return self.__stage('reduction', maximum, None, *args, **kwargs)
+    def couple(self, *args, **kwargs): return self.__stage('reduction', couple, None, *args, **kwargs)
+    
+    def __segments(self):
+        segment = []
+        for stage in self.__stages:
+            if stage.kind in ('broadcast', 'expansion'): 
+                segment.append(stage)
+                continue
+            if segment: yield tuple(segment)
+            segment = []
+            yield (stage,)
+        if segment: yield tuple(segment)
+
+    def evaluate(self): 
+        varray = _typed(self.__varray)
+        if self.__columnar and isinstance(varray, VArray) and varray.datatype in COLUMNAR.keys(): varray = COLUMNAR[varray.datatype].fromvarray(varray)
+        return self.__execute(varray, list(self.__segments()))
+    def __call__(self): return self.evaluate()
+
+    def __execute(self, varray, segments):
+        if not segments: return varray
+        if isinstance(varray, dict): return {key:self.__execute(values, segments) for key, values in varray.items()}
+        segment, segments = segments[0], segments[1:]
+        if segment[0].kind in ('broadcast', 'expansion'): return self.__execute(self.__fused(varray, segment), segments)
+        stage = segment[0]
+        if isinstance(varray, Vector) and varray.datatype not in stage.function.registry().keys(): varray = VArray(varray.tovarray(), variable=varray.variable)
+        if stage.kind == 'reduction' and not len(varray): return None
+        results = stage.function(varray, *stage.args, **stage.kwargs)
+        if stage.kind == 'grouping': results = {key:values if isinstance(values, Vector) else VArray(values, variable=varray.variable, datatype=varray.datatype) for key, values in results.items()}
+        return self.__execute(results, segments)
+    
+    def __fused(self, varray, segment): 
+        while segment and isinstance(varray, Vector): 
+            stage, kwargs = segment[0], {key:value for key, value in segment[0].kwargs.items() if key != 'mode'}
+            if varray.datatype not in stage.function.registry().keys(): 
+                varray = VArray(varray.tovarray(), variable=varray.variable)
+                break
+            varray, segment = stage.function(varray, *stage.args, **kwargs), segment[1:]
+        if not segment: return varray
+        items = iter(varray)
+        for stage in segment: 
+            kwargs = {key:value for key, value in stage.kwargs.items() if key != 'mode'}
+            if stage.kind == 'broadcast': items = map(methodcaller(stage.method, *stage.args, **kwargs), items)
+            elif stage.kind == 'expansion': items = chain.from_iterable(map(methodcaller(stage.method, *stage.args, mode='generator', **kwargs), items))
+            else: raise KeyError(stage.kind)
+        return VArray(list(items))
+
+
     
     
 